@@ -0,0 +1,58 @@
+import time
+from bisect import bisect_left
+from threading import Lock
+
+from django.conf import settings
+
+from core.versions import get_version
+from dishes.models import Ingredient
+from dishes.signals import INGREDIENTS_VERSION
+
+
+class IngredientIndex:
+    """Per-process prefix index over the ingredient catalog.
+
+    Ingredients are kept sorted by casefolded name, a prefix query is a
+    bisect to the first match followed by a scan while names match. The
+    index is rebuilt when the shared catalog version changes and, should
+    a change be missed, INGREDIENT_INDEX_TTL seconds after it was built."""
+
+    def __init__(self):
+        self.version = None
+        self.expires = 0
+        self.entries = ([], [])
+        self.lock = Lock()
+
+    def is_fresh(self, version):
+        return version == self.version and time.monotonic() < self.expires
+
+    def refresh(self):
+        version = get_version(INGREDIENTS_VERSION)
+        if self.is_fresh(version):
+            return
+        with self.lock:
+            if self.is_fresh(version):
+                return
+            rows = sorted(
+                Ingredient.objects.values('id', 'name', 'measurement_unit'),
+                key=lambda row: (row['name'].casefold(), row['id'])
+            )
+            self.entries = ([row['name'].casefold() for row in rows], rows)
+            self.version = version
+            self.expires = time.monotonic() + settings.INGREDIENT_INDEX_TTL
+
+    def search(self, prefix='', limit=None):
+        self.refresh()
+        keys, rows = self.entries
+        prefix = prefix.casefold()
+        results = []
+        for idx in range(bisect_left(keys, prefix), len(keys)):
+            if limit is not None and len(results) >= limit:
+                break
+            if not keys[idx].startswith(prefix):
+                break
+            results.append(rows[idx])
+        return results
+
+
+ingredient_index = IngredientIndex()
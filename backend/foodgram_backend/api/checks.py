@@ -0,0 +1,20 @@
+from django.core.checks import Warning, register
+from django.core.exceptions import ImproperlyConfigured
+
+from .renderers import load_font
+
+
+@register()
+def check_shopping_list_font(app_configs, **kwargs):
+    """PDF shopping lists cannot be rendered without the font, the other
+    formats still work."""
+    try:
+        load_font()
+    except ImproperlyConfigured as error:
+        return [Warning(
+            str(error),
+            hint='Install fonts-dejavu-core or point SHOPPING_LIST_PDF_FONT '
+                 'to another TrueType font with Cyrillic glyphs.',
+            id='api.W001',
+        )]
+    return []
@@ -1,10 +1,16 @@
 from django_filters.rest_framework import (
-    FilterSet, ModelMultipleChoiceFilter, BooleanFilter
+    FilterSet, ModelMultipleChoiceFilter, BooleanFilter, ChoiceFilter
 )
 from django_filters import CharFilter
-from django.db.models import Exists, OuterRef
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, TrigramSimilarity
+)
+from django.db import connection
+from django.db.models import Exists, F, OuterRef, Q
+
+from dishes.models import Ingredient, IngredientInRecipe, Recipe, Tag
 
-from dishes.models import Ingredient, Recipe, Tag
+SEARCH_CONFIG = 'russian'
 
 
 class IngredientFilter(FilterSet):
@@ -21,8 +27,44 @@ class RecipeFilter(FilterSet):
         to_field_name='slug',
         queryset=Tag.objects.all()
     )
+    ingredients = ModelMultipleChoiceFilter(
+        queryset=Ingredient.objects.all(), method='get_ingredients'
+    )
+    exclude_ingredients = ModelMultipleChoiceFilter(
+        queryset=Ingredient.objects.all(), method='get_exclude_ingredients'
+    )
     is_favorited = BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = BooleanFilter(method='get_is_in_shopping_cart')
+    search = CharFilter(method='get_search')
+    ordering = ChoiceFilter(
+        choices=[
+            (field, field) for field in (
+                'favorites_count', '-favorites_count',
+                'in_carts_count', '-in_carts_count',
+            )
+        ],
+        method='get_ordering'
+    )
+
+    def get_ingredients(self, queryset, name, value):
+        """Recipes with all of the ingredients. EXISTS subqueries are
+        index lookups on (ingredient, recipe) and, unlike joins, do not
+        duplicate recipes."""
+        for ingredient in value:
+            queryset = queryset.filter(Exists(
+                IngredientInRecipe.objects.filter(
+                    recipe=OuterRef('pk'), ingredient=ingredient
+                )
+            ))
+        return queryset
+
+    def get_exclude_ingredients(self, queryset, name, value):
+        """Recipes with none of the ingredients."""
+        if not value:
+            return queryset
+        return queryset.filter(~Exists(IngredientInRecipe.objects.filter(
+            recipe=OuterRef('pk'), ingredient__in=value
+        )))
 
     def get_is_favorited(self, queryset, name, value):
         if not value:
@@ -44,6 +86,29 @@ class RecipeFilter(FilterSet):
             Exists(user.cart.filter(recipe=OuterRef('pk')))
         )
 
+    def get_search(self, queryset, name, value):
+        """Full-text match on name and text or a trigram match on name
+        (typos), ranked by relevance. Other backends than PostgreSQL fall
+        back to icontains without ranking."""
+        if connection.vendor != 'postgresql':
+            return queryset.filter(
+                Q(name__icontains=value) | Q(text__icontains=value)
+            )
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(
+            Q(search_vector=query) | Q(name__trigram_similar=value)
+        ).annotate(
+            rank=SearchRank(F('search_vector'), query),
+            similarity=TrigramSimilarity('name', value),
+        ).order_by('-rank', '-similarity', '-id')
+
+    def get_ordering(self, queryset, name, value):
+        """The id tie-breaker keeps pages stable and matches the
+        (counter, id) indexes."""
+        return queryset.order_by(value, '-id' if value[0] == '-' else 'id')
+
     class Meta:
         model = Recipe
         fields = ['author', 'is_favorited']
@@ -0,0 +1,148 @@
+import csv
+import json
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFError, TTFont
+from reportlab.pdfgen.canvas import Canvas
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+SHOPPING_LIST_HEADER = ('name', 'measurement_unit', 'amount')
+FONT_NAME = 'ShoppingListFont'
+
+
+def load_font():
+    """The SHOPPING_LIST_PDF_FONT TrueType font, ImproperlyConfigured
+    when it is not set or cannot be read."""
+    path = settings.SHOPPING_LIST_PDF_FONT
+    if not path:
+        raise ImproperlyConfigured(
+            'SHOPPING_LIST_PDF_FONT must be a TrueType font with Cyrillic '
+            'glyphs.'
+        )
+    try:
+        return TTFont(FONT_NAME, path)
+    except (OSError, TTFError) as error:
+        raise ImproperlyConfigured(
+            f'Cannot load SHOPPING_LIST_PDF_FONT {path}: {error}'
+        )
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """Streams shopping list rows (name, unit, amount) as encoded chunks.
+
+    render() is only used for error responses of the download action,
+    which are JSON whatever the requested format."""
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = JSONRenderer.media_type
+        return JSONRenderer().render(data)
+
+    def stream(self, rows):
+        raise NotImplementedError
+
+
+class TextShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, rows):
+        separator = ''
+        for name, measurement_unit, amount in rows:
+            yield f'{separator}{name} {measurement_unit} {amount}'.encode()
+            separator = '\n'
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(SHOPPING_LIST_HEADER).encode()
+        for row in rows:
+            yield writer.writerow(row).encode()
+
+
+class JSONShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'application/json'
+    format = 'json'
+
+    def stream(self, rows):
+        separator = '['
+        for row in rows:
+            item = json.dumps(
+                dict(zip(SHOPPING_LIST_HEADER, row)), ensure_ascii=False
+            )
+            yield f'{separator}{item}'.encode()
+            separator = ','
+        yield b'[]' if separator == '[' else b']'
+
+
+class PDFShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    font_size = 12
+    margin = 50
+    chunk_size = 64 * 1024
+
+    def get_font(self):
+        """Registers the SHOPPING_LIST_PDF_FONT TrueType font. Ingredient
+        names are Cyrillic, which the built-in PDF fonts cannot draw, so
+        a missing font is an error rather than a fallback."""
+        if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(load_font())
+        return FONT_NAME
+
+    def stream(self, rows):
+        """Resolves the font before the response starts, then draws at
+        most SHOPPING_LIST_PDF_MAX_ROWS rows page by page as they are read
+        from the cursor.
+
+        reportlab writes the document out only on save(), so the whole
+        compressed PDF is held in memory until then: the row cap bounds
+        it (about 1 KB a page of 50 rows). Longer lists end with a note
+        pointing to the other formats, which stream without a limit."""
+        return self.draw(rows, self.get_font())
+
+    def draw(self, rows, font):
+        buffer = BytesIO()
+        canvas = Canvas(buffer, pagesize=A4, pageCompression=1)
+        width, height = A4
+        line_height = self.font_size * 1.5
+        top = height - self.margin
+        y = top
+        canvas.setFont(font, self.font_size)
+        for number, (name, measurement_unit, amount) in enumerate(rows):
+            if y < self.margin:
+                canvas.showPage()
+                canvas.setFont(font, self.font_size)
+                y = top
+            if number == settings.SHOPPING_LIST_PDF_MAX_ROWS:
+                canvas.drawString(self.margin, y, (
+                    f'The list is longer than {number} items, download it '
+                    f'as txt, csv or json for the rest.'
+                ))
+                break
+            canvas.drawString(self.margin, y, f'{name} ({measurement_unit})')
+            canvas.drawRightString(width - self.margin, y, str(amount))
+            y -= line_height
+        canvas.save()
+        buffer.seek(0)
+        while True:
+            chunk = buffer.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -2,14 +2,21 @@ import base64
 
 from rest_framework import serializers
 from rest_framework.validators import ValidationError, UniqueTogetherValidator
+from django.conf import settings
 from django.contrib.auth.hashers import make_password
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Prefetch, prefetch_related_objects
 from django.utils import timezone
 
 from users.models import User, Follow
 from dishes.models import (
-    Tag, Ingredient, IngredientInRecipe, Recipe, Favorite, Cart
+    Tag, Ingredient, IngredientInRecipe, Recipe, Favorite
 )
+from dishes.changes import change_ingredients
+from dishes.images import schedule_image_processing
+from dishes.pantry import log_changes
+from dishes.similar import index_recipes
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -77,6 +84,24 @@ class Base64ImageField(serializers.ImageField):
         return super().to_internal_value(data)
 
 
+class ImageVariantsField(serializers.Field):
+    """Absolute URLs of the downscaled image copies by size name."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        variants = {}
+        for size, path in value.items():
+            url = default_storage.url(path)
+            variants[size] = (
+                request.build_absolute_uri(url) if request else url
+            )
+        return variants
+
+
 class IngredientInRecipetReadSerializer(serializers.ModelSerializer):
     name = serializers.CharField(source='ingredient.name')
     id = serializers.IntegerField(source='ingredient.id')
@@ -91,6 +116,7 @@ class IngredientInRecipetReadSerializer(serializers.ModelSerializer):
 
 class RecipeReadSerializer(serializers.ModelSerializer):
     image = Base64ImageField(required=False, allow_null=True)
+    image_variants = ImageVariantsField()
     tags = TagSerializer(required=False, many=True)
     author = UserReadSerializer()
     ingredients = IngredientInRecipetReadSerializer(
@@ -112,13 +138,49 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'text',
             'cooking_time',
             'image',
+            'image_variants',
+            'image_status',
         )
 
 
+class PantryRecipeSerializer(RecipeReadSerializer):
+    missing = serializers.IntegerField(read_only=True)
+
+    class Meta(RecipeReadSerializer.Meta):
+        fields = RecipeReadSerializer.Meta.fields + ('missing',)
+
+
+class PantrySerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.PANTRY_MAX_INGREDIENTS
+    )
+    max_missing = serializers.IntegerField(
+        min_value=0, max_value=settings.PANTRY_MAX_MISSING, default=2
+    )
+    limit = serializers.IntegerField(
+        min_value=1, max_value=settings.PANTRY_SIZE,
+        default=settings.PANTRY_SIZE
+    )
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.RECIPES_BULK_SIZE
+    )
+
+
 class RecipeCreateSerializer(serializers.ModelSerializer):
     pub_date = serializers.HiddenField(default=timezone.now)
     author = UserReadSerializer(read_only=True)
     image = Base64ImageField()
+    image_variants = ImageVariantsField()
+    tags = serializers.ListField(
+        child=serializers.IntegerField(), write_only=True
+    )
     ingredients = IngredientInRecipetReadSerializer(
         source='amount_recipes', many=True, read_only=True
     )
@@ -139,11 +201,24 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
+            'image_status',
             'text',
             'cooking_time',
         )
+        read_only_fields = ('image_status',)
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            [instance],
+            'tags',
+            Prefetch(
+                'amount_recipes',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                )
+            )
+        )
         data = super().to_representation(instance)
         data['tags'] = TagSerializer(instance.tags, many=True).data
         return data
@@ -156,6 +231,14 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     def validate_tags(self, value):
         if len(value) != len(set(value)):
             raise ValidationError('is duplicated.')
+        existing = set(
+            Tag.objects.filter(pk__in=value).values_list('pk', flat=True)
+        )
+        for pk in value:
+            if pk not in existing:
+                raise ValidationError(
+                    f'Invalid pk "{pk}" - object does not exist.'
+                )
         return value
 
     def validate_empty_values(self, data):
@@ -171,37 +254,101 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         unique = set()
         for dct in ingredients:
             pk = dct.get('id')
+            try:
+                pk = int(str(pk))
+            except ValueError:
+                raise ValidationError(
+                    {f'id {pk}': 'ingredient does not exist.'}
+                )
             if pk in unique:
                 raise ValidationError(
                     {f'id {pk}': 'ingredient is duplicated.'}
                 )
             unique.add(pk)
-            if not Ingredient.objects.filter(pk=pk).exists():
-                raise ValidationError(
-                    {f'id {pk}': 'ingredient does not exist.'}
-                )
             amount = dct.get('amount')
-            if int(amount) < 1:
+            try:
+                valid_amount = int(str(amount)) >= 1
+            except ValueError:
+                valid_amount = False
+            if not valid_amount:
                 raise ValidationError(
                     {f'amount {amount}': 'the value must be greater than 0'}
                 )
+        existing = set(
+            Ingredient.objects.filter(pk__in=unique).values_list(
+                'pk', flat=True
+            )
+        )
+        missing = unique - existing
+        if missing:
+            raise ValidationError(
+                {f'id {min(missing)}': 'ingredient does not exist.'}
+            )
 
         return super().validate_empty_values(data)
 
+    def get_ingredient_amounts(self):
+        return {
+            int(value['id']): int(value['amount'])
+            for value in self.initial_data.get('ingredients')
+        }
+
     def create(self, validated_data):
         recipe = super().create(validated_data)
-        self.save_ingredients_in_recipe(recipe)
+        schedule_image_processing(recipe.pk)
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe, ingredient_id=ingredient, amount=amount
+            )
+            for ingredient, amount in self.get_ingredient_amounts().items()
+        )
+        index_recipes([recipe.pk])
+        log_changes([recipe.pk])
         return recipe
 
-    def save_ingredients_in_recipe(self, recipe):
-        ingredients = self.initial_data.get('ingredients')
-        recipe_ingredients = [IngredientInRecipe] * len(ingredients)
-        for idx, value in enumerate(ingredients):
-            recipe_ingredients[idx].objects.update_or_create(
-                recipe=recipe,
-                ingredient=Ingredient.objects.get(pk=value['id']),
-                amount=value['amount']
+    def update(self, instance, validated_data):
+        if 'image' in validated_data:
+            validated_data['image_status'] = Recipe.IMAGE_PENDING
+        recipe = super().update(instance, validated_data)
+        if 'image' in validated_data:
+            schedule_image_processing(recipe.pk)
+        self.update_ingredients_in_recipe(recipe)
+        return recipe
+
+    def update_ingredients_in_recipe(self, recipe):
+        """Applies the new ingredient list as a diff: one bulk delete,
+        update and insert at most."""
+        new_amounts = self.get_ingredient_amounts()
+        rows = {
+            row.ingredient_id: row
+            for row in recipe.amount_recipes.only(
+                'id', 'recipe_id', 'ingredient_id', 'amount'
             )
+        }
+        old_amounts = {
+            ingredient: row.amount for ingredient, row in rows.items()
+        }
+        removed = rows.keys() - new_amounts.keys()
+        if removed:
+            IngredientInRecipe.objects.filter(
+                pk__in=[rows[ingredient].pk for ingredient in removed]
+            ).delete()
+        changed = []
+        for ingredient, amount in new_amounts.items():
+            row = rows.get(ingredient)
+            if row is not None and row.amount != amount:
+                row.amount = amount
+                changed.append(row)
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ['amount'])
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe, ingredient_id=ingredient, amount=amount
+            )
+            for ingredient, amount in new_amounts.items()
+            if ingredient not in rows
+        )
+        change_ingredients(recipe, old_amounts, new_amounts)
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
@@ -232,6 +379,7 @@ class FavoriteSerializer(serializers.ModelSerializer):
 
 class RecipeFollowSerializer(serializers.ModelSerializer):
     image = Base64ImageField(read_only=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -240,6 +388,8 @@ class RecipeFollowSerializer(serializers.ModelSerializer):
             'name',
             'cooking_time',
             'image',
+            'image_variants',
+            'image_status',
         )
 
 
@@ -286,20 +436,3 @@ class FollowCreateSerializer(serializers.ModelSerializer):
                 'You can\'t subscribe to yourself'
             )
         return data
-
-
-class CartCreateSerializer(serializers.ModelSerializer):
-    user = serializers.HiddenField(
-        default=serializers.CurrentUserDefault()
-    )
-
-    class Meta:
-        model = Cart
-        fields = ('user', 'recipe')
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Cart.objects.all(),
-                fields=['user', 'recipe'],
-                message='You have already this recipe in cart.'
-            )
-        ]
@@ -0,0 +1,80 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from dishes.models import Ingredient, IngredientInRecipe, Recipe, Tag
+from users.models import User
+
+
+# Uploaded images go to a temporary directory, not the real MEDIA_ROOT.
+MEDIA_ROOT = tempfile.mkdtemp()
+# 1x1 transparent PNG.
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAAD'
+    'UlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class APITestCase(TestCase):
+    """Starts every test with empty caches: anonymous responses, catalog
+    bodies and version stamps would otherwise outlive the rolled back
+    data of the previous test."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+    def create_user(self, number):
+        return User.objects.create_user(
+            email=f'user{number}@example.com',
+            username=f'user{number}',
+            first_name=f'First{number}',
+            last_name=f'Last{number}',
+            password='Caligula37',
+        )
+
+    def create_tags(self, count):
+        return [
+            Tag.objects.create(
+                name=f'tag{number}', slug=f'tag{number}', color='#49B64E'
+            )
+            for number in range(count)
+        ]
+
+    def create_ingredients(self, count):
+        return [
+            Ingredient.objects.create(
+                name=f'ingredient{number}', measurement_unit='g'
+            )
+            for number in range(count)
+        ]
+
+    def create_recipe(self, author, tags=(), ingredients=()):
+        recipe = Recipe.objects.create(
+            author=author, name='recipe', text='text', cooking_time=10,
+            image='dishes/recipe.jpg'
+        )
+        recipe.tags.set(tags)
+        IngredientInRecipe.objects.bulk_create([
+            IngredientInRecipe(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in ingredients
+        ])
+        return recipe
+
+    def token_client(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}'
+        )
+        return client
@@ -0,0 +1,86 @@
+from django.test import Client
+
+from dishes.models import (
+    IngredientInRecipe, IngredientsChange, SimilarityBucket
+)
+from dishes.similar import get_buckets
+from users.models import User
+from .base import APITestCase
+
+
+class RecipeAdminTest(APITestCase):
+    """Ingredients edited in the admin inline keep derived data in sync
+    like edits through the API."""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.create_user(0)
+        User.objects.filter(pk=self.admin.pk).update(
+            is_staff=True, is_superuser=True
+        )
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.tags = self.create_tags(1)
+        self.ingredients = self.create_ingredients(3)
+        self.recipe = self.create_recipe(
+            self.admin, self.tags, self.ingredients[:2]
+        )
+
+    def change_ingredients(self, ingredients):
+        rows = list(self.recipe.amount_recipes.order_by('pk'))
+        kept = {row.ingredient_id for row in rows}
+        added = [
+            ingredient for ingredient in ingredients
+            if ingredient.pk not in kept
+        ]
+        data = {
+            'name': self.recipe.name,
+            'text': self.recipe.text,
+            'cooking_time': self.recipe.cooking_time,
+            'author': self.admin.pk,
+            'tags': [tag.pk for tag in self.tags],
+            'amount_recipes-TOTAL_FORMS': len(rows) + len(added),
+            'amount_recipes-INITIAL_FORMS': len(rows),
+            'amount_recipes-MIN_NUM_FORMS': 0,
+            'amount_recipes-MAX_NUM_FORMS': 1000,
+        }
+        for number, row in enumerate(rows):
+            data.update({
+                f'amount_recipes-{number}-id': row.pk,
+                f'amount_recipes-{number}-recipe': self.recipe.pk,
+                f'amount_recipes-{number}-ingredient': row.ingredient_id,
+                f'amount_recipes-{number}-amount': row.amount,
+            })
+            if row.ingredient not in ingredients:
+                data[f'amount_recipes-{number}-DELETE'] = 'on'
+        for number, ingredient in enumerate(added, len(rows)):
+            data.update({
+                f'amount_recipes-{number}-recipe': self.recipe.pk,
+                f'amount_recipes-{number}-ingredient': ingredient.pk,
+                f'amount_recipes-{number}-amount': 1,
+            })
+        response = self.client.post(
+            f'/admin/dishes/recipe/{self.recipe.pk}/change/', data
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_inline_change_reindexes(self):
+        new = self.ingredients[1:]
+        IngredientsChange.objects.all().delete()
+        self.change_ingredients(new)
+        self.assertEqual(
+            list(IngredientsChange.objects.values_list('recipe', flat=True)),
+            [self.recipe.pk]
+        )
+        self.assertEqual(
+            set(IngredientInRecipe.objects.filter(
+                recipe=self.recipe
+            ).values_list('ingredient', flat=True)),
+            {ingredient.pk for ingredient in new}
+        )
+        self.assertEqual(
+            set(SimilarityBucket.objects.filter(
+                recipe=self.recipe
+            ).values_list('bucket', flat=True)),
+            set(get_buckets({ingredient.pk for ingredient in new}))
+        )
@@ -0,0 +1,70 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from users.models import User
+from .base import APITestCase
+
+
+class AnonymousCacheTest(APITestCase):
+    """Anonymous recipe reads are served from the cache until a write
+    that changes them commits."""
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user(1)
+        self.tags = self.create_tags(1)
+        self.ingredients = self.create_ingredients(1)
+        self.recipe = self.create_recipe(
+            self.author, self.tags, self.ingredients
+        )
+        self.url = f'/api/recipes/{self.recipe.pk}/'
+
+    def read(self, url=None):
+        response = self.client.get(url or self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_cached(self):
+        for url in (self.url, '/api/recipes/'):
+            self.read(url)
+            with CaptureQueriesContext(connection) as context:
+                self.read(url)
+            self.assertEqual(len(context), 0)
+
+    def test_recipe_edit(self):
+        self.assertEqual(self.read()['name'], 'recipe')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.token_client(self.author).patch(self.url, {
+                'name': 'renamed',
+                'text': 'text',
+                'cooking_time': 10,
+                'tags': [tag.pk for tag in self.tags],
+                'ingredients': [
+                    {'id': self.ingredients[0].pk, 'amount': 2}
+                ],
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        data = self.read()
+        self.assertEqual(data['name'], 'renamed')
+        self.assertEqual(data['ingredients'][0]['amount'], 2)
+
+    def test_author_edit(self):
+        self.read()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.author.pk).get().save(
+                update_fields=['last_login']
+            )
+        with CaptureQueriesContext(connection) as context:
+            self.read()
+        self.assertEqual(len(context), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.first_name = 'Renamed'
+            self.author.save()
+        self.assertEqual(self.read()['author']['first_name'], 'Renamed')
+
+    def test_users_are_not_cached(self):
+        self.read()
+        client = self.token_client(self.create_user(2))
+        client.post(f'{self.url}favorite/')
+        self.assertTrue(client.get(self.url).data['is_favorited'])
+        self.assertFalse(self.read()['is_favorited'])
@@ -0,0 +1,100 @@
+import gzip
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from dishes.models import Ingredient
+from .base import APITestCase
+
+
+class CatalogCacheTest(APITestCase):
+    """Tags and ingredients answer conditional requests; only unfiltered
+    lists are cached and precompressed."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_tags(2)
+        self.create_ingredients(12)
+        self.client = APIClient()
+
+    def get(self, url, **headers):
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            response = self.client.get(url, **headers)
+        cached = [
+            call.args[0] for call in cache_set.call_args_list
+            if call.args[0].startswith('catalog:')
+        ]
+        return response, cached
+
+    def test_unfiltered_list(self):
+        for url in ('/api/tags/', '/api/ingredients/'):
+            response, cached = self.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(cached), 1)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertTrue(json.loads(gzip.decompress(response.content)))
+            response, cached = self.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(cached, [])
+
+    def test_filtered_list(self):
+        url = '/api/ingredients/?name=ingredient1&limit=2'
+        response, cached = self.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cached, [])
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(
+            [item['name'] for item in response.json()],
+            ['ingredient1', 'ingredient10']
+        )
+        etag = response['ETag']
+        response, cached = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(cached, [])
+
+    def test_writes_change_the_etag(self):
+        response = self.client.get('/api/ingredients/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name='salt', measurement_unit='g')
+        response = self.client.get(
+            '/api/ingredients/', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)), 13)
+
+
+class IngredientAutocompleteTest(APITestCase):
+    """?name= is a case-insensitive prefix over the in-memory index,
+    which follows catalog writes."""
+
+    def setUp(self):
+        super().setUp()
+        for name in ('Salt', 'salmon', 'sugar', 'Basil'):
+            Ingredient.objects.create(name=name, measurement_unit='g')
+        self.client = APIClient()
+
+    def names(self, **params):
+        response = self.client.get('/api/ingredients/', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.json()]
+
+    def test_prefix(self):
+        self.assertEqual(self.names(name='SAL'), ['salmon', 'Salt'])
+        self.assertEqual(self.names(name='s', limit=2), ['salmon', 'Salt'])
+        self.assertEqual(self.names(name='pepper'), [])
+
+    def test_invalid_limit(self):
+        for limit in ('0', 'ten'):
+            response = self.client.get('/api/ingredients/', {'limit': limit})
+            self.assertEqual(response.status_code, 400)
+
+    def test_follows_writes(self):
+        self.assertEqual(self.names(name='sa'), ['salmon', 'Salt'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name='saffron', measurement_unit='g')
+            Ingredient.objects.filter(name='Salt').delete()
+        self.assertEqual(self.names(name='sa'), ['saffron', 'salmon'])
@@ -0,0 +1,56 @@
+from contextlib import redirect_stdout
+from io import StringIO
+
+from django.core.management import call_command
+
+from dishes.models import Favorite, Recipe
+from .base import APITestCase
+
+
+class RecipeCountersTest(APITestCase):
+    """favorites_count follows the favorite action, orders the recipe
+    list and is repaired by recountrecipes."""
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user(0)
+        self.recipes = [self.create_recipe(author) for _ in range(3)]
+        clients = [
+            self.token_client(self.create_user(number))
+            for number in range(1, 3)
+        ]
+        # Recipe n is a favorite of n users.
+        for number, recipe in enumerate(self.recipes):
+            for client in clients[:number]:
+                response = client.post(
+                    f'/api/recipes/{recipe.pk}/favorite/'
+                )
+                self.assertEqual(response.status_code, 201)
+
+    def test_ordering(self):
+        response = self.client.get(
+            '/api/recipes/', {'ordering': '-favorites_count', 'limit': 3}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [recipe.pk for recipe in reversed(self.recipes)]
+        )
+
+    def test_recount(self):
+        Favorite.objects.filter(recipe=self.recipes[2]).delete()
+        with redirect_stdout(StringIO()) as output:
+            call_command('recountrecipes', '--dry-run')
+        self.assertEqual(Recipe.objects.get(
+            pk=self.recipes[2].pk
+        ).favorites_count, 2)
+        self.assertIn('found for 1 recipes', output.getvalue())
+        with redirect_stdout(StringIO()):
+            call_command('recountrecipes')
+        self.assertEqual(
+            [
+                Recipe.objects.get(pk=recipe.pk).favorites_count
+                for recipe in self.recipes
+            ],
+            [0, 1, 0]
+        )
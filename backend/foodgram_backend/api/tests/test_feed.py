@@ -0,0 +1,52 @@
+from django.test import override_settings
+
+from dishes.models import FeedItem, PopularAuthor
+from users.models import Follow
+from .base import APITestCase
+
+
+@override_settings(FEED_FANOUT_LIMIT=3, FEED_FANOUT_LOWER_LIMIT=2)
+class PopularAuthorFeedTest(APITestCase):
+    """Recipes published while an author is popular are read on request
+    and copied into feeds once the author is no longer popular."""
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user(0)
+        self.followers = [self.create_user(number) for number in (1, 2, 3)]
+        self.client = self.token_client(self.followers[0])
+        self.old = self.create_recipe(self.author)
+
+    def follow(self, user):
+        Follow.objects.create(user=user, following=self.author)
+
+    def unfollow(self, user):
+        Follow.objects.get(user=user, following=self.author).delete()
+
+    def is_popular(self):
+        return PopularAuthor.objects.filter(author=self.author).exists()
+
+    def feed(self):
+        response = self.client.get('/api/recipes/feed/')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_popularity_band(self):
+        for user in self.followers[:2]:
+            self.follow(user)
+        self.assertFalse(self.is_popular())
+        self.follow(self.followers[2])
+        self.assertTrue(self.is_popular())
+        new = self.create_recipe(self.author)
+        self.assertFalse(FeedItem.objects.filter(recipe=new).exists())
+        self.assertEqual(self.feed(), [new.pk, self.old.pk])
+        # Between the limits the author stays popular.
+        self.unfollow(self.followers[2])
+        self.assertTrue(self.is_popular())
+        self.assertEqual(self.feed(), [new.pk, self.old.pk])
+        self.unfollow(self.followers[1])
+        self.assertFalse(self.is_popular())
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.followers[0], recipe=new
+        ).exists())
+        self.assertEqual(self.feed(), [new.pk, self.old.pk])
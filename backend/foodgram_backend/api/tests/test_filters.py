@@ -0,0 +1,105 @@
+from unittest import skipUnless
+
+from django.db import connection
+
+from dishes.models import Recipe
+from .base import APITestCase
+
+
+class RecipeSearchTest(APITestCase):
+    """?search= matches recipe names and texts, ranked by relevance on
+    PostgreSQL."""
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user(0)
+        self.recipes = {}
+        for name, text in (
+            ('Borscht', 'Beetroot soup with cabbage'),
+            ('Cabbage rolls', 'Rolls stuffed with rice'),
+            ('Pancakes', 'Flour, milk and eggs'),
+        ):
+            recipe = self.create_recipe(author)
+            Recipe.objects.filter(pk=recipe.pk).update(name=name, text=text)
+            self.recipes[name] = recipe.pk
+
+    def search(self, value):
+        response = self.client.get('/api/recipes/', {'search': value})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_matches_name_and_text(self):
+        self.assertEqual(
+            set(self.search('cabbage')),
+            {self.recipes['Borscht'], self.recipes['Cabbage rolls']}
+        )
+        self.assertEqual(self.search('lasagna'), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'PostgreSQL search')
+    def test_ranking(self):
+        # A match in the name (weight A) ranks above one in the text.
+        self.assertEqual(self.search('cabbage'), [
+            self.recipes['Cabbage rolls'], self.recipes['Borscht']
+        ])
+        # Trigram similarity catches typos in the name.
+        self.assertEqual(self.search('Pancaks'), [self.recipes['Pancakes']])
+
+
+class RecipeIngredientFilterTest(APITestCase):
+    """?ingredients= requires all of them, ?exclude_ingredients= none;
+    both combine with each other and with ?tags=."""
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user(0)
+        self.tags = self.create_tags(2)
+        self.salt, self.sugar, self.milk = self.create_ingredients(3)
+        self.recipes = {
+            name: self.create_recipe(author, tags, ingredients).pk
+            for name, tags, ingredients in (
+                ('salty', self.tags[:1], [self.salt]),
+                ('sweet', self.tags[1:], [self.sugar, self.milk]),
+                ('mixed', self.tags, [self.salt, self.sugar, self.milk]),
+            )
+        }
+
+    def filter(self, **params):
+        response = self.client.get('/api/recipes/', params)
+        self.assertEqual(response.status_code, 200)
+        return {
+            name for name, pk in self.recipes.items()
+            if pk in [recipe['id'] for recipe in response.data['results']]
+        }
+
+    def test_include(self):
+        self.assertEqual(
+            self.filter(ingredients=[self.sugar.pk, self.milk.pk]),
+            {'sweet', 'mixed'}
+        )
+        self.assertEqual(
+            self.filter(ingredients=[self.salt.pk, self.milk.pk]),
+            {'mixed'}
+        )
+
+    def test_exclude(self):
+        self.assertEqual(
+            self.filter(exclude_ingredients=[self.salt.pk]), {'sweet'}
+        )
+        self.assertEqual(
+            self.filter(exclude_ingredients=[self.salt.pk, self.sugar.pk]),
+            set()
+        )
+
+    def test_combined(self):
+        self.assertEqual(self.filter(
+            ingredients=[self.sugar.pk], exclude_ingredients=[self.salt.pk]
+        ), {'sweet'})
+        self.assertEqual(self.filter(
+            ingredients=[self.salt.pk], tags=[self.tags[1].slug]
+        ), {'mixed'})
+
+    def test_unknown_ingredient(self):
+        response = self.client.get(
+            '/api/recipes/', {'exclude_ingredients': 10 ** 6}
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,43 @@
+import base64
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from rest_framework.test import APIClient
+
+from dishes.images import process_image
+from dishes.models import Recipe
+from .base import IMAGE, APITestCase
+
+
+class ImageProcessingTest(APITestCase):
+    """Anonymous responses cached before processing show its result."""
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user(1)
+        self.recipe = self.create_recipe(self.author, self.create_tags(1))
+        self.anonymous = APIClient()
+
+    def get(self):
+        return self.anonymous.get(f'/api/recipes/{self.recipe.pk}/').data
+
+    def process(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            process_image(self.recipe.pk)
+
+    def test_variants_replace_cached_pending(self):
+        image = base64.b64decode(IMAGE.split(';base64,')[1])
+        name = default_storage.save('dishes/recipe.png', ContentFile(image))
+        Recipe.objects.filter(pk=self.recipe.pk).update(image=name)
+        self.assertEqual(self.get()['image_status'], Recipe.IMAGE_PENDING)
+        self.process()
+        data = self.get()
+        self.assertEqual(data['image_status'], Recipe.IMAGE_READY)
+        self.assertTrue(data['image_variants'])
+
+    def test_failure_replaces_cached_pending(self):
+        # create_recipe points the image at a file that does not exist.
+        self.assertEqual(self.get()['image_status'], Recipe.IMAGE_PENDING)
+        with self.assertLogs('dishes.images', 'ERROR'):
+            self.process()
+        self.assertEqual(self.get()['image_status'], Recipe.IMAGE_FAILED)
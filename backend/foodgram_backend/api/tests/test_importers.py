@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+
+from core.importers import iter_json_array
+from core.management.commands import importcsv, importjson
+from dishes.models import Ingredient
+from .base import APITestCase
+
+ROWS = [
+    ('salt', 'g'),
+    ('sugar', 'g'),
+    ('salt', 'g'),
+    ('milk', 'ml'),
+]
+
+
+class IngredientImportTest(APITestCase):
+    """importcsv and importjson add new ingredients, skip known ones and
+    make the catalog serve them at once."""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.write_files(ROWS)
+        # Builds the cached catalog body and the index before the import.
+        self.assertEqual(self.client.get('/api/ingredients/').json(), [])
+
+    def write_files(self, rows):
+        with open(os.path.join(self.directory, 'ingredients.csv'), 'w',
+                  encoding='utf8') as file:
+            file.writelines(f'{name},{unit}\n' for name, unit in rows)
+        with open(os.path.join(self.directory, 'ingredients.json'), 'w',
+                  encoding='utf8') as file:
+            json.dump([
+                {'name': name, 'measurement_unit': unit}
+                for name, unit in rows
+            ], file)
+
+    def run_import(self, command, *args):
+        with mock.patch.object(
+            importcsv, 'DATAFILES_DIR', self.directory
+        ), mock.patch.object(
+            importjson, 'DATAFILES_DIR', self.directory
+        ), redirect_stdout(StringIO()) as output:
+            call_command(command, '--batch-size', '2', *args)
+        return output.getvalue()
+
+    def catalog(self):
+        return sorted(
+            (item['name'], item['measurement_unit'])
+            for item in self.client.get('/api/ingredients/').json()
+        )
+
+    def test_import(self):
+        for command in ('importcsv', 'importjson'):
+            with self.subTest(command=command):
+                Ingredient.objects.all().delete()
+                output = self.run_import(command)
+                self.assertIn('inserted 3', output)
+                self.assertEqual(self.catalog(), sorted(set(ROWS)))
+                self.assertIn('inserted 0', self.run_import(command))
+
+    def test_dry_run(self):
+        self.assertIn('Dry run', self.run_import('importcsv', '--dry-run'))
+        self.assertEqual(self.catalog(), [])
+
+    def test_upsert(self):
+        self.run_import('importcsv')
+        self.write_files([('milk', 'l'), ('sugar', 'kg'), ('sugar', 'g')])
+        # Upserts compare rows within a batch, keep these in one.
+        output = self.run_import('importcsv', '--upsert', '--batch-size', '3')
+        self.assertIn('updated 1', output)
+        self.assertEqual(self.catalog(), [
+            ('milk', 'l'), ('salt', 'g'), ('sugar', 'g'), ('sugar', 'kg')
+        ])
+
+    def test_json_chunks(self):
+        document = json.dumps([{'name': 'a, ]'}, {'name': 'b'}])
+        self.assertEqual(
+            list(iter_json_array(StringIO(document), chunk_size=3)),
+            [{'name': 'a, ]'}, {'name': 'b'}]
+        )
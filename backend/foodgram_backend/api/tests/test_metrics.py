@@ -0,0 +1,29 @@
+from users.models import User
+from .base import APITestCase
+
+
+class SerializeMetricsTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.create_user(1)
+        User.objects.filter(pk=self.admin.pk).update(is_staff=True)
+        self.client = self.token_client(self.admin)
+        tags = self.create_tags(2)
+        ingredients = self.create_ingredients(3)
+        for _ in range(3):
+            self.create_recipe(self.admin, tags, ingredients)
+
+    def test_serialize_time_reported(self):
+        response = self.client.get('/api/recipes/')
+        timings = dict(
+            part.split(';')[0:2]
+            for part in response['Server-Timing'].split(', ')
+        )
+        self.assertGreater(float(timings['serialize'][len('dur='):]), 0)
+        metrics = self.client.get('/api/metrics/').content.decode()
+        self.assertIn(
+            'foodgram_request_serialize_seconds_count'
+            '{endpoint="RecipeViewSet.list"}',
+            metrics
+        )
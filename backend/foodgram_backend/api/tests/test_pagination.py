@@ -0,0 +1,43 @@
+import datetime
+
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from dishes.models import FeedItem, Recipe
+from users.models import Follow
+from .base import APITestCase
+
+
+class CursorPaginationTest(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user(1)
+        self.reader = self.create_user(2)
+        Follow.objects.create(user=self.reader, following=self.author)
+        self.recipes = [self.create_recipe(self.author) for _ in range(6)]
+        # Six recipes within one millisecond, the latest ones first.
+        start = timezone.now().replace(microsecond=123000)
+        for number, recipe in enumerate(self.recipes):
+            pub_date = start + datetime.timedelta(microseconds=number * 100)
+            Recipe.objects.filter(pk=recipe.pk).update(pub_date=pub_date)
+            FeedItem.objects.filter(recipe=recipe).update(pub_date=pub_date)
+        self.expected = [recipe.pk for recipe in reversed(self.recipes)]
+
+    def walk(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_recipes_in_one_millisecond(self):
+        ids = self.walk(APIClient(), '/api/recipes/?cursor=&limit=2')
+        self.assertEqual(ids, self.expected)
+
+    def test_feed_in_one_millisecond(self):
+        ids = self.walk(
+            self.token_client(self.reader), '/api/recipes/feed/?limit=2'
+        )
+        self.assertEqual(ids, self.expected)
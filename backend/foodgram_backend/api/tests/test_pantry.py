@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from dishes.models import IngredientsChange
+from dishes.pantry import prune_changes
+from .base import APITestCase
+
+
+class PantryChangesTest(APITestCase):
+
+    def test_prune_old_changes(self):
+        IngredientsChange.objects.bulk_create([
+            IngredientsChange(recipe=1), IngredientsChange(recipe=2)
+        ])
+        IngredientsChange.objects.filter(recipe=1).update(
+            created=timezone.now() - timedelta(
+                seconds=settings.PANTRY_CHANGES_TTL + 1
+            )
+        )
+        self.assertEqual(prune_changes(), 1)
+        self.assertEqual(
+            list(IngredientsChange.objects.values_list('recipe', flat=True)),
+            [2]
+        )
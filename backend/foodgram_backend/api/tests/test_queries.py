@@ -0,0 +1,64 @@
+from rest_framework.test import APIClient
+
+from dishes.models import Cart, Favorite
+from users.models import Follow
+from .base import APITestCase
+
+
+class RecipeReadQueriesTest(APITestCase):
+    """List and detail responses run a fixed number of queries, whatever
+    the page size or the number of tags and ingredients of recipes."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(1)
+        authors = [self.create_user(number) for number in range(2, 5)]
+        tags = self.create_tags(3)
+        ingredients = self.create_ingredients(20)
+        self.recipes = [
+            self.create_recipe(
+                authors[number % 3], tags[:number % 3 + 1],
+                ingredients[:number % 20 + 1]
+            )
+            for number in range(60)
+        ]
+        Follow.objects.create(user=self.user, following=authors[0])
+        for recipe in self.recipes[::4]:
+            Favorite.objects.create(user=self.user, recipe=recipe)
+            Cart.objects.create(user=self.user, recipe=recipe)
+        self.anonymous = APIClient()
+        self.authorized = self.token_client(self.user)
+        # Fills the token cache, requests below authenticate from it.
+        self.authorized.get('/api/users/me/')
+
+    def assert_queries(self, client, number, url):
+        with self.assertNumQueries(number):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_anonymous_list(self):
+        for limit in (5, 50):
+            response = self.assert_queries(
+                self.anonymous, 5, f'/api/recipes/?limit={limit}'
+            )
+            self.assertEqual(len(response.data['results']), limit)
+
+    def test_authorized_list(self):
+        for limit in (5, 50):
+            response = self.assert_queries(
+                self.authorized, 5, f'/api/recipes/?limit={limit}'
+            )
+            self.assertEqual(len(response.data['results']), limit)
+
+    def test_anonymous_detail(self):
+        for recipe in (self.recipes[0], self.recipes[59]):
+            self.assert_queries(
+                self.anonymous, 4, f'/api/recipes/{recipe.pk}/'
+            )
+
+    def test_authorized_detail(self):
+        for recipe in (self.recipes[0], self.recipes[59]):
+            self.assert_queries(
+                self.authorized, 4, f'/api/recipes/{recipe.pk}/'
+            )
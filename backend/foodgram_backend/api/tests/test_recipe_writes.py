@@ -0,0 +1,113 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from dishes.models import Ingredient, IngredientInRecipe
+from .base import IMAGE, APITestCase
+
+
+class RecipeWriteQueriesTest(APITestCase):
+    """Creating and editing recipes runs a fixed number of queries,
+    whatever the number of ingredients."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(1)
+        self.tags = self.create_tags(2)
+        self.ingredients = self.create_ingredients(40)
+        self.client = self.token_client(self.user)
+        # Fills the token cache, requests below authenticate from it.
+        self.client.get('/api/users/me/')
+
+    def payload(self, ingredients, amount=1):
+        return {
+            'name': 'recipe',
+            'text': 'text',
+            'cooking_time': 10,
+            'image': IMAGE,
+            'tags': [tag.pk for tag in self.tags],
+            'ingredients': [
+                {'id': ingredient.pk, 'amount': amount}
+                for ingredient in ingredients
+            ],
+        }
+
+    def create(self, ingredients):
+        response = self.client.post(
+            '/api/recipes/', self.payload(ingredients), format='json'
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def patch(self, number, recipe, ingredients, amount=1):
+        with self.assertNumQueries(number):
+            response = self.client.patch(
+                f'/api/recipes/{recipe}/',
+                self.payload(ingredients, amount),
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def assert_amounts(self, recipe, ingredients, amount):
+        self.assertEqual(
+            dict(IngredientInRecipe.objects.filter(
+                recipe=recipe
+            ).values_list('ingredient', 'amount')),
+            {ingredient.pk: amount for ingredient in ingredients}
+        )
+
+    def test_create(self):
+        for count in (2, 20):
+            with self.assertNumQueries(18):
+                recipe = self.create(self.ingredients[:count])
+            self.assert_amounts(recipe, self.ingredients[:count], 1)
+
+    def test_patch_add(self):
+        for count in (2, 20):
+            recipe = self.create(self.ingredients[:1])
+            self.patch(21, recipe, self.ingredients[:count + 1])
+            self.assert_amounts(recipe, self.ingredients[:count + 1], 1)
+
+    def test_patch_update(self):
+        for count in (2, 20):
+            recipe = self.create(self.ingredients[:count])
+            self.patch(15, recipe, self.ingredients[:count], amount=5)
+            self.assert_amounts(recipe, self.ingredients[:count], 5)
+
+    def test_patch_remove(self):
+        for count in (2, 20):
+            recipe = self.create(self.ingredients[:count + 1])
+            self.patch(22, recipe, self.ingredients[:1])
+            self.assert_amounts(recipe, self.ingredients[:1], 1)
+
+    def test_one_query_validates_ingredients(self):
+        missing = Ingredient(pk=10 ** 6)
+        for count in (2, 20):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(
+                    '/api/recipes/',
+                    self.payload(self.ingredients[:count] + [missing]),
+                    format='json'
+                )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(f'id {missing.pk}', response.data)
+            self.assertEqual(len(context), 1)
+            self.assertIn(' IN (', context.captured_queries[0]['sql'])
+
+    def test_malformed_ingredients(self):
+        first = self.ingredients[0]
+        for ingredients in (
+            [{'id': None, 'amount': 1}],
+            [{'amount': 1}],
+            [{'id': 'abc', 'amount': 1}],
+            [{'id': first.pk, 'amount': 1},
+             {'id': str(first.pk), 'amount': 1}],
+            [{'id': first.pk, 'amount': None}],
+            [{'id': first.pk, 'amount': 'abc'}],
+        ):
+            payload = self.payload([])
+            payload['ingredients'] = ingredients
+            response = self.client.post(
+                '/api/recipes/', payload, format='json'
+            )
+            self.assertEqual(response.status_code, 400, ingredients)
+        self.assertFalse(IngredientInRecipe.objects.exists())
@@ -0,0 +1,156 @@
+import json
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from django.core.checks import Warning
+from django.core.management import call_command
+from django.test import Client, override_settings
+from reportlab.pdfbase import pdfmetrics
+
+from api.checks import check_shopping_list_font
+from dishes.models import Cart, IngredientInRecipe
+from users.models import User
+from .base import APITestCase
+
+
+class ShoppingListDownloadTest(APITestCase):
+    """The summed ingredients of the cart in every export format."""
+
+    url = '/api/recipes/download_shopping_cart/'
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(1)
+        self.ingredients = self.create_ingredients(2)
+        self.client = self.token_client(self.user)
+        for number in range(2):
+            recipe = self.create_recipe(
+                self.create_user(number + 2), ingredients=self.ingredients
+            )
+            self.client.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+
+    def download(self, export_format):
+        response = self.client.get(self.url, {'format': export_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Disposition'],
+            f'attachment; filename="shopping_list.{export_format}"'
+        )
+        return b''.join(response.streaming_content)
+
+    def test_txt(self):
+        self.assertEqual(
+            self.download('txt').decode(),
+            'ingredient0 g 2\ningredient1 g 2'
+        )
+
+    def test_csv(self):
+        self.assertEqual(self.download('csv').decode().splitlines(), [
+            'name,measurement_unit,amount',
+            'ingredient0,g,2',
+            'ingredient1,g,2',
+        ])
+
+    def test_json(self):
+        self.assertEqual(json.loads(self.download('json')), [
+            {'name': 'ingredient0', 'measurement_unit': 'g', 'amount': 2},
+            {'name': 'ingredient1', 'measurement_unit': 'g', 'amount': 2},
+        ])
+
+    def test_pdf(self):
+        self.assertTrue(self.download('pdf').startswith(b'%PDF'))
+
+    @override_settings(SHOPPING_LIST_PDF_FONT='/nonexistent/font.ttf')
+    @mock.patch.object(pdfmetrics, 'getRegisteredFontNames', list)
+    def test_pdf_without_font(self):
+        with self.assertLogs('api.views', 'ERROR'):
+            response = self.client.get(self.url, {'format': 'pdf'})
+        self.assertEqual(response.status_code, 406)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('txt, csv or json', response.json()['detail'])
+        self.assertEqual(self.download('csv').count(b'\n'), 3)
+        [warning] = check_shopping_list_font(None)
+        self.assertIsInstance(warning, Warning)
+
+
+class ShoppingListConsistencyTest(APITestCase):
+    """The download matches the cart through cart changes, recipe edits,
+    the admin and the rebuild command."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(1)
+        User.objects.filter(pk=self.user.pk).update(
+            is_staff=True, is_superuser=True
+        )
+        self.tags = self.create_tags(1)
+        self.ingredients = self.create_ingredients(3)
+        self.recipes = [
+            self.create_recipe(self.user, self.tags, self.ingredients[:2]),
+            self.create_recipe(self.user, self.tags, self.ingredients[1:]),
+        ]
+        self.client = self.token_client(self.user)
+        self.admin = Client()
+        self.admin.force_login(self.user)
+
+    def assert_matches_cart(self):
+        expected = {}
+        for row in IngredientInRecipe.objects.filter(
+            recipe__cart__user=self.user
+        ).select_related('ingredient'):
+            name = row.ingredient.name
+            expected[name] = expected.get(name, 0) + row.amount
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/', {'format': 'json'}
+        )
+        self.assertEqual({
+            item['name']: item['amount']
+            for item in json.loads(b''.join(response.streaming_content))
+        }, expected)
+
+    def test_api_changes(self):
+        for recipe in self.recipes:
+            self.client.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+            self.assert_matches_cart()
+        response = self.client.patch(
+            f'/api/recipes/{self.recipes[0].pk}/', {
+                'name': 'recipe',
+                'text': 'text',
+                'cooking_time': 10,
+                'tags': [tag.pk for tag in self.tags],
+                'ingredients': [
+                    {'id': self.ingredients[0].pk, 'amount': 5},
+                    {'id': self.ingredients[2].pk, 'amount': 3},
+                ],
+            }, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assert_matches_cart()
+        self.client.delete(f'/api/recipes/{self.recipes[1].pk}/shopping_cart/')
+        self.assert_matches_cart()
+
+    def test_admin_changes(self):
+        response = self.admin.post('/admin/dishes/cart/add/', {
+            'recipe': self.recipes[0].pk, 'user': self.user.pk
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assert_matches_cart()
+        cart = Cart.objects.get()
+        response = self.admin.post(f'/admin/dishes/cart/{cart.pk}/change/', {
+            'recipe': self.recipes[1].pk, 'user': self.user.pk
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assert_matches_cart()
+        response = self.admin.post(
+            f'/admin/dishes/cart/{cart.pk}/delete/', {'post': 'yes'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assert_matches_cart()
+
+    def test_rebuild(self):
+        for recipe in self.recipes:
+            Cart.objects.create(user=self.user, recipe=recipe)
+        with redirect_stdout(StringIO()):
+            call_command('rebuildshoppinglists')
+        self.assert_matches_cart()
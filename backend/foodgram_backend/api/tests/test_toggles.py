@@ -0,0 +1,153 @@
+from unittest import mock
+
+from rest_framework.test import APIClient
+
+from api.views import RecipeViewSet
+from dishes.models import Cart, Favorite, Recipe
+from .base import APITestCase
+
+
+class ToggleTest(APITestCase):
+    """Adding a recipe to favorites or the cart and removing it."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(1)
+        self.recipe = self.create_recipe(self.create_user(2))
+        self.client = self.token_client(self.user)
+
+    def test_favorite_response(self):
+        response = self.client.post(f'/api/recipes/{self.recipe.pk}/favorite/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {
+            'id': self.recipe.pk,
+            'name': self.recipe.name,
+            'image': 'http://testserver/media/dishes/recipe.jpg',
+            'cooking_time': self.recipe.cooking_time,
+        })
+        self.assertTrue(Favorite.objects.filter(
+            user=self.user, recipe=self.recipe
+        ).exists())
+        response = self.client.post(f'/api/recipes/{self.recipe.pk}/favorite/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_counters_follow_toggles(self):
+        for action, field in (('favorite', 'favorites_count'),
+                              ('shopping_cart', 'in_carts_count')):
+            url = f'/api/recipes/{self.recipe.pk}/{action}/'
+            self.assertEqual(self.client.post(url).status_code, 201)
+            self.assertEqual(self.client.post(url).status_code, 400)
+            recipe = Recipe.objects.get(pk=self.recipe.pk)
+            self.assertEqual(getattr(recipe, field), 1)
+            self.assertEqual(self.client.delete(url).status_code, 204)
+            self.assertEqual(self.client.delete(url).status_code, 400)
+            recipe = Recipe.objects.get(pk=self.recipe.pk)
+            self.assertEqual(getattr(recipe, field), 0)
+        self.assertFalse(Cart.objects.exists())
+
+    def test_concurrent_add(self):
+        """Another request adds the recipe between the lookup of this one
+        and its INSERT: only the first one counts."""
+        self.recipe.amount_recipes.create(
+            ingredient=self.create_ingredients(1)[0], amount=3
+        )
+        other = APIClient()
+        other.force_authenticate(self.user)
+        lookup = RecipeViewSet.get_toggled_recipe
+        raced = set()
+
+        def lookup_then_add(view, pk):
+            recipe = lookup(view, pk)
+            if view.action not in raced:
+                raced.add(view.action)
+                response = other.post(f'/api/recipes/{pk}/{view.action}/')
+                self.assertEqual(response.status_code, 201)
+            return recipe
+
+        for action, field in (('favorite', 'favorites_count'),
+                              ('shopping_cart', 'in_carts_count')):
+            with mock.patch.object(
+                RecipeViewSet, 'get_toggled_recipe', lookup_then_add
+            ):
+                response = self.client.post(
+                    f'/api/recipes/{self.recipe.pk}/{action}/'
+                )
+            self.assertEqual(response.status_code, 400)
+            recipe = Recipe.objects.get(pk=self.recipe.pk)
+            self.assertEqual(getattr(recipe, field), 1)
+        self.assertEqual(
+            list(self.user.shopping_list.values_list('amount', flat=True)),
+            [3]
+        )
+
+
+class BulkToggleTest(APITestCase):
+    """POST and DELETE /api/recipes/favorite/ and shopping_cart/ change
+    many recipes at once and report a status per id."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(1)
+        author = self.create_user(2)
+        self.recipes = [self.create_recipe(author) for _ in range(3)]
+        self.client = self.token_client(self.user)
+
+    def test_statuses(self):
+        first, second, third = [recipe.pk for recipe in self.recipes]
+        missing = 10 ** 6
+        for action, field in (('favorite', 'favorites_count'),
+                              ('shopping_cart', 'in_carts_count')):
+            url = f'/api/recipes/{action}/'
+            self.client.post(f'/api/recipes/{first}/{action}/')
+            response = self.client.post(url, {
+                'recipes': [first, second, missing, second]
+            }, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, [
+                {'id': first, 'status': 'exists'},
+                {'id': second, 'status': 'added'},
+                {'id': missing, 'status': 'not_found'},
+            ])
+            response = self.client.delete(url, {
+                'recipes': [second, third]
+            }, format='json')
+            self.assertEqual(response.data, [
+                {'id': second, 'status': 'removed'},
+                {'id': third, 'status': 'not_found'},
+            ])
+            self.assertEqual(
+                [
+                    getattr(Recipe.objects.get(pk=recipe.pk), field)
+                    for recipe in self.recipes
+                ],
+                [1, 0, 0]
+            )
+
+    def test_shopping_list(self):
+        ingredients = self.create_ingredients(1)
+        recipes = [
+            self.create_recipe(self.recipes[0].author, (), ingredients)
+            for _ in range(2)
+        ]
+        self.client.post('/api/recipes/shopping_cart/', {
+            'recipes': [recipe.pk for recipe in recipes]
+        }, format='json')
+        self.assertEqual(
+            list(self.user.shopping_list.values_list('amount', flat=True)),
+            [2]
+        )
+        self.client.delete('/api/recipes/shopping_cart/', {
+            'recipes': [recipes[0].pk]
+        }, format='json')
+        self.assertEqual(
+            list(self.user.shopping_list.values_list('amount', flat=True)),
+            [1]
+        )
+
+    def test_invalid(self):
+        for data in ({}, {'recipes': []}, {'recipes': ['one']}):
+            response = self.client.post(
+                '/api/recipes/favorite/', data, format='json'
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Favorite.objects.exists())
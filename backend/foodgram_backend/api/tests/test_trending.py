@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from dishes.models import Cart, Favorite
+from dishes.trending import update_scores
+from .base import APITestCase
+
+
+class TrendingTest(APITestCase):
+    """/api/recipes/trending/ orders recipes by favorite and cart activity
+    decayed by TRENDING_HALF_LIFE."""
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user(0)
+        self.users = [self.create_user(number) for number in range(1, 4)]
+        self.recipes = [self.create_recipe(author) for _ in range(3)]
+        self.now = timezone.now()
+
+    def trending(self):
+        response = self.client.get('/api/recipes/trending/')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def update(self, half_lives):
+        update_scores(self.now + timedelta(
+            seconds=half_lives * settings.TRENDING_HALF_LIFE
+        ))
+
+    def test_ranking(self):
+        first, second, third = self.recipes
+        Favorite.objects.create(user=self.users[0], recipe=first)
+        # A cart addition weighs two favorites.
+        Cart.objects.create(user=self.users[0], recipe=second)
+        self.update(0)
+        self.assertEqual(self.trending(), [second.pk, first.pk])
+        # Two half-lives later the old cart addition weighs 0.5, below a
+        # new favorite on top of the old one (1 + 0.25).
+        Favorite.objects.create(user=self.users[1], recipe=first)
+        self.update(2)
+        self.assertEqual(self.trending(), [first.pk, second.pk])
+        self.assertNotIn(third.pk, self.trending())
+
+    def test_decayed_scores_are_dropped(self):
+        Favorite.objects.create(user=self.users[0], recipe=self.recipes[0])
+        self.update(0)
+        self.assertEqual(self.trending(), [self.recipes[0].pk])
+        self.update(10)
+        self.assertEqual(self.trending(), [])
@@ -0,0 +1,121 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from users.models import Follow, User
+from .base import APITestCase
+
+
+class SetPasswordTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(1)
+        self.client = self.token_client(self.user)
+        # Fills the token cache, the request below authenticates from it.
+        self.client.get('/api/users/me/')
+
+    def test_saves_only_password(self):
+        # Changed behind the cached copy of the user.
+        User.objects.filter(pk=self.user.pk).update(first_name='Renamed')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/users/set_password/', {
+                'current_password': 'Caligula37',
+                'new_password': 'Nero54321',
+            })
+        self.assertEqual(response.status_code, 204)
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "password"', updates[0])
+        self.assertNotIn('first_name', updates[0])
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.first_name, 'Renamed')
+        self.assertTrue(user.check_password('Nero54321'))
+
+
+class TokenCacheTest(APITestCase):
+    """Logged out tokens stop working, even when the logout races with a
+    request that read the token just before."""
+
+    def test_logout(self):
+        for number, alias in enumerate(('', 'default')):
+            with self.subTest(alias=alias), self.settings(
+                TOKEN_CACHE_ALIAS=alias
+            ):
+                client = self.token_client(self.create_user(number))
+                self.assertEqual(
+                    client.get('/api/users/me/').status_code, 200
+                )
+                response = client.post('/api/auth/token/logout/')
+                self.assertEqual(response.status_code, 204)
+                self.assertEqual(
+                    client.get('/api/users/me/').status_code, 401
+                )
+
+    def test_logout_during_request(self):
+        read = TokenAuthentication.authenticate_credentials
+
+        def read_then_logout(authentication, key):
+            credentials = read(authentication, key)
+            Token.objects.filter(key=key).delete()
+            return credentials
+
+        for number, alias in enumerate(('', 'default')):
+            with self.subTest(alias=alias), self.settings(
+                TOKEN_CACHE_ALIAS=alias
+            ):
+                client = self.token_client(self.create_user(number))
+                with mock.patch.object(
+                    TokenAuthentication, 'authenticate_credentials',
+                    read_then_logout
+                ):
+                    self.assertEqual(
+                        client.get('/api/users/me/').status_code, 200
+                    )
+                self.assertEqual(
+                    client.get('/api/users/me/').status_code, 401
+                )
+
+
+class SubscriptionsTest(APITestCase):
+    """?recipes_limit=N keeps the newest N recipes of every author."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(1)
+        self.client = self.token_client(self.user)
+        self.recipes = {}
+        for number, count in ((2, 3), (3, 1), (4, 0)):
+            author = self.create_user(number)
+            Follow.objects.create(user=self.user, following=author)
+            self.recipes[author.pk] = [
+                self.create_recipe(author).pk for _ in range(count)
+            ]
+
+    def test_recipes_limit(self):
+        for limit in (0, 2, 5):
+            with self.subTest(limit=limit):
+                response = self.client.get(
+                    '/api/users/subscriptions/', {'recipes_limit': limit}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), 3)
+                for author in response.data['results']:
+                    recipes = self.recipes[author['id']]
+                    self.assertEqual(author['recipes_count'], len(recipes))
+                    self.assertEqual(
+                        [recipe['id'] for recipe in author['recipes']],
+                        recipes[::-1][:limit]
+                    )
+
+    def test_invalid_recipes_limit(self):
+        response = self.client.get(
+            '/api/users/subscriptions/', {'recipes_limit': 'all'}
+        )
+        self.assertEqual(response.status_code, 400)
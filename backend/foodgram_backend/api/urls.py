@@ -2,7 +2,8 @@ from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
 from api.views import (
-    UsersViewSet, TagViewSet, IngredientViewSet, RecipeViewSet
+    UsersViewSet, TagViewSet, IngredientViewSet, RecipeViewSet,
+    metrics, token_cache_stats
 )
 
 app_name = 'api'
@@ -18,6 +19,8 @@ router.register(r'recipes', RecipeViewSet, basename='recipes')
 
 urlpatterns = [
 
+    path('metrics/', metrics, name='metrics'),
     path('', include(router.urls)),
+    path('auth/token/cache/', token_cache_stats, name='token_cache'),
     re_path(r'^auth/', include('djoser.urls.authtoken')),
 ]
@@ -1,29 +1,61 @@
-from django.http import HttpResponse
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse, StreamingHttpResponse
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import (
+    AllowAny, IsAdminUser, IsAuthenticated
+)
 from rest_framework.response import Response
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import NotAcceptable, ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.serializers import SetPasswordSerializer
+from django.db import connection, transaction
 from django.db.models import (
-    Value, Exists, Count, OuterRef, Subquery, Prefetch, Sum
+    Value, Exists, Count, OuterRef, Subquery, Prefetch, F, Window
 )
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, RowNumber
 
 from . import serializers
-from dishes.models import Tag, Ingredient, Recipe, IngredientInRecipe
+from dishes.feed import get_feed
+from dishes.pantry import search as search_pantry
+from dishes.similar import get_similar
+from dishes.models import (
+    Tag, Ingredient, Recipe, IngredientInRecipe, ShoppingListItem,
+    Favorite, Cart
+)
+from dishes.signals import (
+    INGREDIENTS_VERSION, RECIPES_VERSION, TAGS_VERSION
+)
 from .filters import IngredientFilter, RecipeFilter
+from .autocomplete import ingredient_index
 from .permissions import RecipesPermissions
-from core.pagination import LimitNumberPagination
+from .renderers import (
+    TextShoppingListRenderer, CSVShoppingListRenderer,
+    JSONShoppingListRenderer, PDFShoppingListRenderer
+)
+from core.authentication import token_cache
+from core.caching import AnonymousCacheMixin, CatalogCacheMixin
+from core.metrics import SerializeMetricsMixin, registry, serialize
+from core.pagination import LimitCursorPagination, LimitNumberPagination
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 
-class UsersViewSet(viewsets.ModelViewSet):
+class UsersViewSet(SerializeMetricsMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     permission_classes = [AllowAny]
     http_method_names = ['get', 'post', 'delete']
+    pagination_class = LimitCursorPagination
+    cursor_ordering = ('id',)
 
     def get_serializer_class(self):
         if self.action in ('retrieve', 'list', 'me'):
@@ -36,21 +68,54 @@ class UsersViewSet(viewsets.ModelViewSet):
             return serializers.FollowCreateSerializer
         return serializers.UserCreateSerializer
 
+    def get_recipes_limit(self):
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit is None:
+            return None
+        if not recipes_limit.isdigit():
+            raise ValidationError(
+                {'recipes_limit': 'A non-negative integer is required.'}
+            )
+        return int(recipes_limit)
+
     def get_subscriptions_queryset(self):
-        authors = User.objects.filter(
-            following__user=self.request.user
-        ).annotate(recipes_count=Count('recipes'))
-        recipes_limit = self.request.GET.get('recipes_limit')
-        if not recipes_limit:
-            return authors
-        sub = Subquery(
-            Recipe.objects.filter(author__in=authors).filter(
-                author=OuterRef('author_id')
-            ).order_by('pub_date').values('id')[:int(recipes_limit)]
-        )
-        return authors.prefetch_related(
-            Prefetch('recipes', queryset=Recipe.objects.filter(id__in=sub))
-        ).all()
+        """Followed authors with recipes_count from a correlated subquery
+        and their recipes in one prefetch query; with ?recipes_limit=N
+        only the newest N recipes of each author, numbered by ROW_NUMBER()
+        over the recipes of that author."""
+        user = self.request.user
+        recipes = Recipe.objects.only(
+            'id', 'name', 'cooking_time', 'image', 'image_variants',
+            'image_status', 'author'
+        ).order_by('-pub_date', '-id')
+        recipes_limit = self.get_recipes_limit()
+        if recipes_limit is not None:
+            ranked = Recipe.objects.filter(
+                author__in=user.follower.values('following')
+            ).annotate(row_number_in_author=Window(
+                RowNumber(),
+                partition_by=[F('author')],
+                order_by=[F('pub_date').desc(), F('id').desc()]
+            )).values('id', 'row_number_in_author')
+            # Django 3.2 cannot filter on window functions, hence the
+            # outer query over the ranked rows.
+            sql, params = ranked.query.sql_with_params()
+            quote_name = connection.ops.quote_name
+            recipes = recipes.filter(pk__in=RawSQL(
+                f'SELECT {quote_name("id")} FROM ({sql}) AS ranked '
+                f'WHERE {quote_name("row_number_in_author")} <= %s',
+                (*params, recipes_limit)
+            ))
+        recipes_count = Recipe.objects.filter(
+            author=OuterRef('pk')
+        ).order_by().values('author').annotate(
+            total=Count('pk')
+        ).values('total')
+        return User.objects.filter(following__user=user).annotate(
+            recipes_count=Coalesce(Subquery(recipes_count), 0)
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes)
+        ).order_by('id')
 
     def get_queryset(self):
         if self.action in ('subscriptions', 'subscribe'):
@@ -59,7 +124,7 @@ class UsersViewSet(viewsets.ModelViewSet):
             is_subscribed = Value(False)
         else:
             is_subscribed = Exists(
-                self.request.user.follower.filter(id=OuterRef('following__id'))
+                self.request.user.follower.filter(following=OuterRef('pk'))
             )
         return User.objects.all().annotate(is_subscribed=is_subscribed)
 
@@ -78,7 +143,7 @@ class UsersViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(
             request.user
         )
-        return Response(serializer.data)
+        return Response(serialize(serializer))
 
     @action(
         ['get'],
@@ -90,10 +155,10 @@ class UsersViewSet(viewsets.ModelViewSet):
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(serialize(serializer))
 
         serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response(serialize(serializer))
 
     @action(
         ['post', 'delete'],
@@ -116,7 +181,7 @@ class UsersViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         serializer.save()
         serialazer_data = serializers.FollowReadSerializer(
-            self.get_queryset().first()
+            self.get_subscriptions_queryset().get(pk=author.pk)
         ).data
         headers = self.get_success_headers(serializer.data)
         return Response(
@@ -132,38 +197,61 @@ class UsersViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.request.user.set_password(serializer.data['new_password'])
-        self.request.user.save()
+        # The user may come from the token cache: a full save would write
+        # back its stale copy of every other field.
+        self.request.user.save(update_fields=['password'])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CatalogCacheMixin, SerializeMetricsMixin,
+                 viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
     pagination_class = None
     permission_classes = [AllowAny]
+    catalog_version = TAGS_VERSION
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CatalogCacheMixin, SerializeMetricsMixin,
+                        viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
     pagination_class = None
     permission_classes = [AllowAny]
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientFilter
+    catalog_version = INGREDIENTS_VERSION
+
+    def get_list_data(self, request, *args, **kwargs):
+        """Served from the in-memory prefix index, ?name= is the prefix
+        and ?limit= caps the number of results."""
+        limit = request.query_params.get('limit')
+        if limit is not None:
+            if not limit.isdigit() or int(limit) < 1:
+                raise ValidationError(
+                    {'limit': 'A positive integer is required.'}
+                )
+            limit = int(limit)
+        return ingredient_index.search(
+            request.query_params.get('name', ''), limit
+        )
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(AnonymousCacheMixin, SerializeMetricsMixin,
+                    viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
     permission_classes = [RecipesPermissions]
-    pagination_class = LimitNumberPagination
+    pagination_class = LimitCursorPagination
+    lookup_value_regex = r'\d+'
+    cursor_ordering = ('-pub_date', '-id')
+    anonymous_cache_alias = 'recipes'
+    anonymous_cache_version = RECIPES_VERSION
 
     def get_serializer_class(self):
-        if self.action == 'favorite':
-            return serializers.FavoriteSerializer
-        if self.action == 'shopping_cart':
-            return serializers.CartCreateSerializer
+        if self.action in ('favorite_bulk', 'shopping_cart_bulk'):
+            return serializers.RecipeIdsSerializer
         if self.action in ('create', 'partial_update'):
             return serializers.RecipeCreateSerializer
         return serializers.RecipeReadSerializer
@@ -180,22 +268,110 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 user.cart.filter(recipe=OuterRef('pk'))
             )
             is_subscribed = Exists(
-                self.request.user.follower.filter(id=OuterRef('following__id'))
+                user.follower.filter(following=OuterRef('pk'))
             )
-        queryset = Recipe.objects.annotate(
+        queryset = Recipe.objects.defer('search_vector').annotate(
             is_favorited=is_favorited,
             is_in_shopping_cart=is_in_shopping_cart
-        ).order_by('-pub_date')
+        ).order_by('-pub_date', '-id')
         return queryset.prefetch_related(
             Prefetch(
                 'author', queryset=User.objects.annotate(
                     is_subscribed=is_subscribed
                 )
+            ),
+            'tags',
+            Prefetch(
+                'amount_recipes',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                )
             )
         )
 
     def perform_create(self, serializer):
-        return serializer.save(author=self.request.user)
+        with transaction.atomic():
+            return serializer.save(author=self.request.user)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            return serializer.save()
+
+    @action(
+        ['get'],
+        detail=False,
+        permission_classes=[IsAuthenticated]
+    )
+    def feed(self, request):
+        """Recipes of followed authors, newest first, in cursor pages."""
+        queryset = self.get_queryset()
+
+        def get_recipes(position, limit):
+            ids = get_feed(request.user, position, limit)
+            recipes = queryset.in_bulk(ids)
+            return [recipes[pk] for pk in ids if pk in recipes]
+        page = self.paginator.paginate_rows(get_recipes, Recipe, request)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serialize(serializer))
+
+    @action(
+        ['get'],
+        detail=False,
+        pagination_class=LimitNumberPagination
+    )
+    def trending(self, request):
+        """The TRENDING_SIZE recipes with the most time-decayed favorite
+        and cart activity, see dishes.trending."""
+        queryset = self.get_queryset().filter(
+            trending_score__isnull=False
+        ).order_by('-trending_score__rank', '-id')[:settings.TRENDING_SIZE]
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serialize(serializer))
+
+    @action(['get'], detail=False)
+    def pantry(self, request):
+        """Recipes to cook from ?ingredients=<id>&ingredients=<id>...,
+        fewest missing ingredients (at most ?max_missing=) first, see
+        dishes.pantry."""
+        query = serializers.PantrySerializer(data={
+            'ingredients': request.query_params.getlist('ingredients'),
+            **{
+                name: request.query_params[name]
+                for name in ('max_missing', 'limit')
+                if name in request.query_params
+            }
+        })
+        query.is_valid(raise_exception=True)
+        found = dict(search_pantry(**query.validated_data))
+        recipes = self.get_queryset().in_bulk(found)
+        page = []
+        for pk, missing in found.items():
+            if pk in recipes:
+                recipes[pk].missing = missing
+                page.append(recipes[pk])
+        return Response(serialize(
+            serializers.PantryRecipeSerializer(
+                page, many=True, context=self.get_serializer_context()
+            )
+        ))
+
+    @action(['get'], detail=True)
+    def similar(self, request, pk):
+        """Recipes with the most similar ingredient sets, see
+        dishes.similar. ?limit= defaults to SIMILAR_SIZE."""
+        get_object_or_404(Recipe, pk=pk)
+        limit = request.query_params.get('limit', str(settings.SIMILAR_SIZE))
+        if not limit.isdigit():
+            raise ValidationError(
+                {'limit': 'A non-negative integer is required.'}
+            )
+        ids = get_similar(int(pk), min(int(limit), settings.SIMILAR_SIZE))
+        recipes = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in ids if pk in recipes], many=True
+        )
+        return Response(serialize(serializer))
 
     @action(
         ['delete', 'post'],
@@ -203,56 +379,214 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated]
     )
     def favorite(self, request, pk):
-        favorites = request.user.favorites
-        if self.request.method == 'DELETE':
-            favorite = favorites.filter(
-                recipe=self.get_object()
-            )
-            if not favorite.exists():
+        if request.method == 'DELETE':
+            if not self.remove_recipe(Favorite, 'favorites_count', pk):
                 return Response(
                     {'This recipe was not found in favorites'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            favorite.delete()
             return Response(
                 {'This recipe has been successfully deleted from favorites.'},
                 status=status.HTTP_204_NO_CONTENT
             )
-        if favorites.filter(recipe_id=pk).exists():
+        recipe = self.get_toggled_recipe(pk)
+        if not self.add_recipe(Favorite, 'favorites_count', pk):
             return Response(
                 {'This recipe is already in favorites'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        serializer = self.get_serializer(
-            data={'recipe': pk}
+        serializer = serializers.FavoriteSerializer(
+            Favorite(user=request.user, recipe=recipe),
+            context=self.get_serializer_context()
         )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(
-            serializer.data, status=status.HTTP_201_CREATED
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def get_toggled_recipe(self, pk):
+        """The recipe with only the fields of toggle responses, or a 400
+        response for a missing one as from the former serializers."""
+        recipe = Recipe.objects.only(
+            *serializers.RecipeFollowSerializer.Meta.fields
+        ).filter(pk=pk).first()
+        if recipe is None:
+            raise ValidationError(
+                {'recipe': [f'Invalid pk "{pk}" - object does not exist.']}
+            )
+        return recipe
+
+    def add_recipe(self, model, counter, pk):
+        """Adds the recipe to favorites or the cart of the user by one
+        INSERT ... ON CONFLICT DO NOTHING (INSERT OR IGNORE on SQLite):
+        the unique constraint, not a prior read, tells whether the row
+        was there, so concurrent toggles cannot both count. Returns
+        whether the row was inserted."""
+        statement = connection.ops.insert_statement(ignore_conflicts=True)
+        on_conflict = connection.ops.ignore_conflicts_suffix_sql(
+            ignore_conflicts=True
         )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'''
+                {statement} {model._meta.db_table} (user_id, recipe_id)
+                SELECT %s, id FROM {Recipe._meta.db_table} WHERE id = %s
+                {on_conflict}
+            ''', [self.request.user.pk, int(pk)])
+            added = cursor.rowcount > 0
+            if added:
+                Recipe.objects.filter(pk=pk).update(
+                    **{counter: F(counter) + 1}
+                )
+                if model is Cart:
+                    ShoppingListItem.objects.add_recipes(
+                        self.request.user, [pk]
+                    )
+        return added
+
+    def remove_recipe(self, model, counter, pk):
+        """Removes the recipe from favorites or the cart of the user by one
+        DELETE, returning whether a row was deleted. Raises Http404 for a
+        missing recipe."""
+        with transaction.atomic():
+            deleted, _ = model.objects.filter(
+                user=self.request.user, recipe=pk
+            ).delete()
+            if deleted:
+                Recipe.objects.filter(pk=pk).update(
+                    **{counter: F(counter) - deleted}
+                )
+                if model is Cart:
+                    ShoppingListItem.objects.remove_recipes(
+                        self.request.user, [pk]
+                    )
+        if not deleted:
+            get_object_or_404(Recipe.objects.only('pk'), pk=pk)
+        return bool(deleted)
 
     @action(
-        ['get'],
+        ['delete', 'post'],
         detail=False,
+        url_path='favorite',
+        url_name='favorite-bulk',
         permission_classes=[IsAuthenticated]
     )
+    def favorite_bulk(self, request):
+        """Adds or removes {"recipes": [<id>, ...]} at once, see
+        change_in_bulk."""
+        with transaction.atomic():
+            _, results = self.change_in_bulk(Favorite, 'favorites_count')
+        return Response(results)
+
+    @action(
+        ['delete', 'post'],
+        detail=False,
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk',
+        permission_classes=[IsAuthenticated]
+    )
+    def shopping_cart_bulk(self, request):
+        """Adds or removes {"recipes": [<id>, ...]} at once, see
+        change_in_bulk."""
+        with transaction.atomic():
+            changed, results = self.change_in_bulk(Cart, 'in_carts_count')
+            if changed and request.method == 'DELETE':
+                ShoppingListItem.objects.remove_recipes(request.user, changed)
+            elif changed:
+                ShoppingListItem.objects.add_recipes(request.user, changed)
+        return Response(results)
+
+    def change_in_bulk(self, model, counter):
+        """Adds (POST) the recipes of the request to favorites or the cart
+        of the user by one bulk INSERT or removes them (DELETE) by one
+        DELETE ... IN, keeping the counter of recipes. Returns the ids
+        changed and {"id": <id>, "status": <status>} per requested id,
+        the status being added, exists or not_found for POST and removed
+        or not_found for DELETE."""
+        serializer = self.get_serializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['recipes']))
+        user = self.request.user
+        # Serializes bulk changes of the user: the rows read below stay
+        # the rows written.
+        User.objects.select_for_update().filter(pk=user.pk).exists()
+        if self.request.method == 'DELETE':
+            changed = list(model.objects.filter(
+                user=user, recipe__in=ids
+            ).values_list('recipe', flat=True))
+            model.objects.filter(user=user, recipe__in=changed).delete()
+            delta = -1
+            statuses = dict.fromkeys(changed, 'removed')
+        else:
+            present = dict(Recipe.objects.filter(pk__in=ids).annotate(
+                present=Exists(model.objects.filter(
+                    user=user, recipe=OuterRef('pk')
+                ))
+            ).values_list('pk', 'present'))
+            changed = [pk for pk in ids if present.get(pk) is False]
+            model.objects.bulk_create(
+                [model(user=user, recipe_id=pk) for pk in changed],
+                ignore_conflicts=True
+            )
+            delta = 1
+            statuses = {
+                pk: 'exists' if is_present else 'added'
+                for pk, is_present in present.items()
+            }
+        if changed:
+            Recipe.objects.filter(pk__in=changed).update(
+                **{counter: F(counter) + delta}
+            )
+        return changed, [
+            {'id': pk, 'status': statuses.get(pk, 'not_found')}
+            for pk in ids
+        ]
+
+    @action(
+        ['get'],
+        detail=False,
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            TextShoppingListRenderer,
+            CSVShoppingListRenderer,
+            JSONShoppingListRenderer,
+            PDFShoppingListRenderer,
+        ]
+    )
     def download_shopping_cart(self, request):
-        ingredients = IngredientInRecipe.objects.filter(
-            recipe_id__in=Subquery(request.user.cart.all().values('recipe_id'))
-        ).values(
+        """?format=txt|csv|json|pdf, plain text by default."""
+        renderer = request.accepted_renderer
+        rows = request.user.shopping_list.values_list(
             'ingredient__name',
             'ingredient__measurement_unit',
-        ).annotate(total=Sum('amount'))
-        output = '\n'.join(
-            [
-                ' '.join(
-                    [str(value) for value in ingredient.values()]
-                ) for ingredient in ingredients
-            ]
+            'amount',
+        ).order_by('ingredient__name').iterator()
+        try:
+            chunks = renderer.stream(rows)
+        except ImproperlyConfigured as error:
+            logger.error('Shopping list export: %s', error)
+            raise NotAcceptable(
+                f'The {renderer.format} format is unavailable, download '
+                f'the list as txt, csv or json.'
+            )
+        response = StreamingHttpResponse(
+            self.log_export(chunks, renderer.format),
+            content_type=(
+                f'{renderer.media_type}; charset={renderer.charset}'
+                if renderer.charset else renderer.media_type
+            )
         )
-        return HttpResponse(
-            content=output, content_type='text/plain'
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{renderer.format}"'
+        )
+        return response
+
+    def log_export(self, chunks, export_format):
+        started = time.monotonic()
+        size = 0
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+        logger.info(
+            'Shopping list export: user %s, format %s, %d bytes, %.3f s',
+            self.request.user.pk, export_format, size,
+            time.monotonic() - started
         )
 
     @action(
@@ -262,21 +596,38 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def shopping_cart(self, request, pk):
         if request.method == 'DELETE':
-            cart = request.user.cart.filter(
-                recipe=get_object_or_404(Recipe, pk=pk)
-            )
-            if not cart.exists():
+            if not self.remove_recipe(Cart, 'in_carts_count', pk):
                 return Response(
                     'There is not recipe in cart', status.HTTP_400_BAD_REQUEST
                 )
-            cart.delete()
             return Response('Recipe deleted.', status.HTTP_204_NO_CONTENT)
-        serializer = self.get_serializer(data={'recipe': pk})
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        serializer_data = serializers.RecipeFollowSerializer(
-            self.get_object()
-        ).data
+        recipe = self.get_toggled_recipe(pk)
+        if not self.add_recipe(Cart, 'in_carts_count', pk):
+            raise ValidationError(
+                {'non_field_errors': ['You have already this recipe in cart.']}
+            )
         return Response(
-            serializer_data, status=status.HTTP_201_CREATED
+            serializers.RecipeFollowSerializer(recipe).data,
+            status=status.HTTP_201_CREATED
         )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def token_cache_stats(request):
+    return Response(token_cache.stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """Request metrics of this process in the Prometheus text format."""
+    lines = list(registry.expose())
+    for name, value in token_cache.stats().items():
+        kind = 'gauge' if name == 'size' else 'counter'
+        suffix = '' if kind == 'gauge' else '_total'
+        lines.append(f'# TYPE foodgram_token_cache_{name}{suffix} {kind}')
+        lines.append(f'foodgram_token_cache_{name}{suffix} {value}')
+    return HttpResponse(
+        '\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4'
+    )
@@ -0,0 +1,140 @@
+import pickle
+import time
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+TOKEN_KEY = 'token:{}'
+GENERATION_KEY = 'token-generation:{}'
+
+
+class TokenCache:
+    """token -> (user, token) with a per-process LRU in front of an
+    optional shared Django cache.
+
+    Entries are kept pickled, so every request gets its own user object.
+
+    Invalidation removes the entry from this process and the shared
+    cache, other processes drop theirs when the LRU TTL runs out, so
+    TOKEN_CACHE_TTL bounds how long a revoked token may still work.
+
+    Credentials read from the database before an invalidation must not
+    be written back after it: set() takes the generation() seen before
+    the read and drops the write when invalidate() has bumped it since.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.local_generation = 0
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        alias = settings.TOKEN_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    def get(self, key):
+        key = sha256(key.encode()).hexdigest()
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.local_hits += 1
+                return pickle.loads(entry[1])
+            local_generation = self.local_generation
+        value = None
+        if self.shared is not None:
+            value = self.shared.get(TOKEN_KEY.format(key))
+        if value is None:
+            self.misses += 1
+            return None
+        self.shared_hits += 1
+        self.store_local(key, value, local_generation)
+        return value
+
+    def generation(self, key):
+        """Opaque stamp to pass to set() for credentials read now."""
+        key = sha256(key.encode()).hexdigest()
+        return self.local_generation, self.shared_generation(key)
+
+    def shared_generation(self, key):
+        if self.shared is None:
+            return None
+        return self.shared.get(GENERATION_KEY.format(key), 0)
+
+    def set(self, key, value, generation):
+        """Caches credentials unless the token was invalidated after
+        generation() was taken.
+
+        The shared entry is written first and removed again if the
+        generation moved meanwhile: invalidate() bumps it before
+        deleting, so one of the two always sees the other."""
+        local_generation, shared_generation = generation
+        key = sha256(key.encode()).hexdigest()
+        if self.shared is not None:
+            self.shared.set(
+                TOKEN_KEY.format(key), value, settings.TOKEN_CACHE_SHARED_TTL
+            )
+            if self.shared_generation(key) != shared_generation:
+                self.shared.delete(TOKEN_KEY.format(key))
+                return
+        self.store_local(key, value, local_generation)
+
+    def store_local(self, key, value, local_generation):
+        with self.lock:
+            if self.local_generation != local_generation:
+                return
+            self.entries[key] = (
+                time.monotonic() + settings.TOKEN_CACHE_TTL,
+                pickle.dumps(value)
+            )
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.TOKEN_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, *keys):
+        keys = [sha256(key.encode()).hexdigest() for key in keys]
+        if self.shared is not None:
+            for key in keys:
+                generation_key = GENERATION_KEY.format(key)
+                self.shared.add(
+                    generation_key, 0, settings.TOKEN_CACHE_SHARED_TTL
+                )
+                self.shared.incr(generation_key)
+        with self.lock:
+            self.local_generation += 1
+            for key in keys:
+                self.entries.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete_many([TOKEN_KEY.format(key) for key in keys])
+
+    def stats(self):
+        return {
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'size': len(self.entries),
+        }
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication without the Token + User query on cache hits."""
+
+    def authenticate_credentials(self, key):
+        credentials = token_cache.get(key)
+        if credentials is None:
+            generation = token_cache.generation(key)
+            credentials = super().authenticate_credentials(key)
+            token_cache.set(key, credentials, generation)
+        return credentials
@@ -0,0 +1,264 @@
+import json
+import math
+import random
+import re
+import time
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from dishes.models import (
+    Cart, Favorite, Ingredient, IngredientInRecipe, Recipe, Tag
+)
+from users.models import Follow, User
+
+VARIABLE = re.compile(r'{{(\w+)}}')
+
+# Requests of the Postman collection replayed by each scenario, by name.
+SCENARIOS = {
+    'browse': [
+        'get_recipes_list // No Auth',
+        'get_recipes_list_with_limit_param // User',
+        'get_recipes_list_with_two_tags_param // User',
+        'get_recipe_detail // User',
+        'get_tag_list // User',
+        'get_ingredients_list_with_name_filter // User',
+    ],
+    'favorite': [
+        'add_to_favorite // User',
+        'get_recipes_list_with_is_favorited_param // User',
+        'remove_from_favorite // User',
+    ],
+    'cart': [
+        'add_to_shopping_cart // User',
+        'get_recipes_list_with_is_in_shopping_cart_param // User',
+        'download_shopping_cart // User',
+        'remove_from_shopping_cart // User',
+    ],
+    'subscriptions': [
+        'create_subscription // User',
+        'get_subscription_list_with_recipes_limit_param // User',
+        'get_subscription_list_with_limit_param // User',
+        'delete_first_subscription // User',
+    ],
+    'ingredients': [
+        'get_recipes_list_with_ingredients_param // User',
+        'get_recipes_list_with_two_ingredients_param // User',
+        'get_recipes_list_with_exclude_ingredients_param // User',
+        'get_recipes_list_with_ingredients_and_tags_param // User',
+    ],
+}
+
+USER_AUTH = {
+    'type': 'apikey',
+    'apikey': [
+        {'key': 'value', 'value': 'Token {{userToken}}'},
+        {'key': 'key', 'value': 'Authorization'},
+    ],
+}
+# Requests of the scenarios missing from the Postman collection, in its
+# format.
+REQUESTS = {
+    'get_recipes_list_with_ingredients_param // User': {
+        'method': 'GET',
+        'url': (
+            '{{baseUrl}}/api/recipes/?ingredients={{firstRecipeIngredientId}}'
+        ),
+        'auth': USER_AUTH,
+    },
+    'get_recipes_list_with_two_ingredients_param // User': {
+        'method': 'GET',
+        'url': (
+            '{{baseUrl}}/api/recipes/?ingredients={{firstRecipeIngredientId}}'
+            '&ingredients={{secondRecipeIngredientId}}'
+        ),
+        'auth': USER_AUTH,
+    },
+    'get_recipes_list_with_exclude_ingredients_param // User': {
+        'method': 'GET',
+        'url': (
+            '{{baseUrl}}/api/recipes/?exclude_ingredients='
+            '{{firstRecipeIngredientId}}&exclude_ingredients='
+            '{{secondRecipeIngredientId}}'
+        ),
+        'auth': USER_AUTH,
+    },
+    'get_recipes_list_with_ingredients_and_tags_param // User': {
+        'method': 'GET',
+        'url': (
+            '{{baseUrl}}/api/recipes/?ingredients={{firstRecipeIngredientId}}'
+            '&ingredients={{secondRecipeIngredientId}}'
+            '&exclude_ingredients={{firstIndredientId}}'
+            '&tags={{secondTagSlug}}&tags={{thirdTagSlug}}'
+        ),
+        'auth': USER_AUTH,
+    },
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list of numbers."""
+    values = sorted(values)
+    rank = max(math.ceil(fraction * len(values)), 1)
+    return values[rank - 1]
+
+
+def latency_summary(seconds):
+    """p50/p95/p99 of request durations, in milliseconds."""
+    return {
+        name: percentile(seconds, fraction) * 1000
+        for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))
+    }
+
+
+class PostmanCollection:
+    """Requests of a Postman v2.1 collection, looked up by name."""
+
+    def __init__(self, path):
+        with open(path, encoding='utf-8') as file:
+            collection = json.load(file)
+        self.requests = {}
+        self.collect(collection['item'])
+        for name, request in REQUESTS.items():
+            self.requests.setdefault(name, request)
+
+    def collect(self, items):
+        for item in items:
+            if 'item' in item:
+                self.collect(item['item'])
+            else:
+                self.requests.setdefault(item['name'], item['request'])
+
+    def render(self, name, variables):
+        """(method, path, body, headers) with {{variables}} replaced."""
+        request = self.requests[name]
+
+        def substitute(value):
+            return VARIABLE.sub(
+                lambda match: str(variables.get(match.group(1), '')), value
+            )
+
+        url = request['url']
+        path = substitute(url['raw'] if isinstance(url, dict) else url)
+        body = request.get('body', {}).get('raw', '')
+        headers = {}
+        auth = request.get('auth', {})
+        if auth.get('type') == 'apikey':
+            options = {
+                option['key']: option['value'] for option in auth['apikey']
+            }
+            header = 'HTTP_' + options['key'].upper().replace('-', '_')
+            headers[header] = substitute(options['value'])
+        return request['method'], path, substitute(body), headers
+
+
+class Benchmark:
+    """Replays scenarios against the dataset in the current database
+    through the Django test client, recording per request name its
+    latency (server side, no network), status and SQL query count."""
+
+    def __init__(self, collection, scenarios, seed=0):
+        self.collection = collection
+        self.scenarios = scenarios
+        self.rng = random.Random(seed)
+        self.client = Client()
+        self.results = {}
+        self.user_ids = list(User.objects.values_list('id', flat=True))
+        self.recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+        self.tags = list(Tag.objects.values_list('id', 'slug'))
+        self.ingredients = list(Ingredient.objects.values_list('id', 'name'))
+
+    def get_variables(self):
+        """Collection variables for one pass: a random user and recipes
+        and authors this user can still favorite, add and follow."""
+        user = self.rng.choice(self.user_ids)
+        used = set(Favorite.objects.filter(user=user).values_list(
+            'recipe', flat=True
+        )) | set(Cart.objects.filter(user=user).values_list(
+            'recipe', flat=True
+        ))
+        recipe = self.choose(self.recipe_ids, used)
+        followed = set(Follow.objects.filter(user=user).values_list(
+            'following', flat=True
+        ))
+        author = self.choose(self.user_ids, followed | {user})
+        tags = self.rng.sample(self.tags, 3)
+        ingredient = self.rng.choice(self.ingredients)
+        # Ingredients of a recipe (the same one twice for a single
+        # ingredient), so that filters by them match some recipes.
+        recipe_ingredients = sorted(IngredientInRecipe.objects.filter(
+            recipe=recipe
+        ).values_list('ingredient', flat=True))
+        first, second = self.rng.sample(recipe_ingredients * 2, 2)
+        return {
+            'baseUrl': '',
+            'userToken': Token.objects.get_or_create(user_id=user)[0].key,
+            'userId': user,
+            'secondUserId': author,
+            'thirdUserId': author,
+            'firstRecipeId': recipe,
+            'firstTagId': tags[0][0],
+            'secondTagSlug': tags[1][1],
+            'thirdTagSlug': tags[2][1],
+            'firstIndredientId': ingredient[0],
+            'ingredientNameFirstLatter': ingredient[1][0],
+            'firstRecipeIngredientId': first,
+            'secondRecipeIngredientId': second,
+        }
+
+    def choose(self, ids, excluded):
+        while True:
+            chosen = self.rng.choice(ids)
+            if chosen not in excluded:
+                return chosen
+
+    def run(self, iterations, warmup=1):
+        for iteration in range(warmup + iterations):
+            for scenario in self.scenarios:
+                variables = self.get_variables()
+                for name in SCENARIOS[scenario]:
+                    self.send(name, variables, record=iteration >= warmup)
+
+    def send(self, name, variables, record=True):
+        method, path, body, headers = self.collection.render(
+            name, variables
+        )
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self.client.generic(
+                method, path, body, content_type='application/json',
+                **headers
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+            duration = time.perf_counter() - started
+        if record:
+            result = self.results.setdefault(
+                name, {'seconds': [], 'queries': [], 'errors': 0}
+            )
+            result['seconds'].append(duration)
+            result['queries'].append(len(queries))
+            result['errors'] += response.status_code >= 400
+
+    def report(self):
+        """One row per request name: count, errors, latency percentiles
+        in milliseconds and mean/max SQL queries."""
+        rows = []
+        for scenario in self.scenarios:
+            for name in SCENARIOS[scenario]:
+                result = self.results.get(name)
+                if result is None:
+                    continue
+                queries = result['queries']
+                rows.append({
+                    'scenario': scenario,
+                    'request': name,
+                    'count': len(result['seconds']),
+                    'errors': result['errors'],
+                    **latency_summary(result['seconds']),
+                    'queries': sum(queries) / len(queries),
+                    'max_queries': max(queries),
+                })
+        return rows
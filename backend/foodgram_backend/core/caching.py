@@ -0,0 +1,154 @@
+import gzip
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from core.versions import get_version
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CATALOG_KEY = 'catalog:{}:{}:{}'
+ANONYMOUS_KEY = 'anonymous:{}:{}:{}'
+
+
+def compress(body):
+    """Encodings of the body, from the most to the least preferred."""
+    encodings = {}
+    if brotli is not None:
+        encodings['br'] = brotli.compress(body)
+    encodings['gzip'] = gzip.compress(body)
+    encodings['identity'] = body
+    return encodings
+
+
+def accepted_encodings(request):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return {
+        value.split(';')[0].strip().lower() for value in header.split(',')
+    }
+
+
+class CatalogCacheMixin:
+    """Conditional GET and precompressed bodies for near-static data.
+
+    The unfiltered list body is cached together with its compressed
+    forms under the `catalog_version` stamp, so a bump of the stamp on
+    writes makes every process rebuild it. Filtered lists and single
+    objects are built on every request and only carry an ETag: caching
+    them would fill the cache with a body per query string. Responses
+    answer 304 when the ETag (or Last-Modified of the cached body)
+    matches. Cached bodies also expire after CATALOG_CACHE_TIMEOUT, which
+    bounds staleness should a bump be missed.
+    """
+    catalog_version = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_catalog_response(
+            request, lambda: self.get_list_data(request, *args, **kwargs),
+            cached=not request.query_params
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_catalog_response(
+            request,
+            lambda: super(CatalogCacheMixin, self).retrieve(
+                request, *args, **kwargs
+            ).data
+        )
+
+    def get_list_data(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs).data
+
+    def get_catalog_response(self, request, get_data, cached=False):
+        version = get_version(self.catalog_version)
+        if cached:
+            key = CATALOG_KEY.format(
+                self.catalog_version, version, request.path
+            )
+            entry = cache.get(key)
+            if entry is None:
+                body = JSONRenderer().render(get_data())
+                entry = {
+                    'last_modified': int(time.time()),
+                    'digest': md5(body).hexdigest()[:12],
+                    'bodies': compress(body),
+                }
+                cache.set(key, entry, settings.CATALOG_CACHE_TIMEOUT)
+        else:
+            body = JSONRenderer().render(get_data())
+            entry = {
+                'last_modified': None,
+                'digest': md5(body).hexdigest()[:12],
+                'bodies': {'identity': body},
+            }
+        etag = f'W/"{self.catalog_version}-{version}-{entry["digest"]}"'
+        response = get_conditional_response(
+            request, etag=etag, last_modified=entry['last_modified']
+        )
+        if response is None:
+            accepted = accepted_encodings(request)
+            for encoding, body in entry['bodies'].items():
+                if encoding in accepted or encoding == 'identity':
+                    break
+            response = HttpResponse(body, content_type='application/json')
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        if entry['last_modified'] is not None:
+            response['Last-Modified'] = http_date(entry['last_modified'])
+        response['Cache-Control'] = (
+            f'public, max-age={settings.CATALOG_CACHE_MAX_AGE}'
+        )
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class AnonymousCacheMixin:
+    """Caches list and retrieve responses for anonymous users.
+
+    Anonymous users all get the same data, so it is cached per absolute
+    URL (filters, page, limit and cursor included) in the
+    `anonymous_cache_alias` cache under the `anonymous_cache_version`
+    generation. Writes bump the generation instead of deleting keys.
+    """
+    anonymous_cache_alias = 'default'
+    anonymous_cache_version = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_anonymous_response(
+            request, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_anonymous_response(
+            request, super().retrieve, *args, **kwargs
+        )
+
+    def get_anonymous_response(self, request, view, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return view(request, *args, **kwargs)
+        cache_backend = caches[self.anonymous_cache_alias]
+        url = md5(request.build_absolute_uri().encode()).hexdigest()
+        key = ANONYMOUS_KEY.format(
+            self.anonymous_cache_version,
+            get_version(self.anonymous_cache_version),
+            url
+        )
+        data = cache_backend.get(key)
+        if data is not None:
+            return Response(data)
+        response = view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache_backend.set(key, response.data)
+        return response
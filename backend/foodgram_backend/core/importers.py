@@ -0,0 +1,209 @@
+import csv
+import json
+import time
+from io import StringIO
+from itertools import islice
+
+from django.db import connection, transaction
+
+from core.versions import bump_version
+from dishes.models import Ingredient
+from dishes.signals import INGREDIENTS_VERSION, RECIPES_VERSION
+
+FIELDS = ['name', 'measurement_unit']
+
+
+def iter_json_array(file, chunk_size=64 * 1024):
+    """Yields the items of a top level JSON array without loading the
+    whole document."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if not started and buffer:
+            if buffer[0] != '[':
+                raise ValueError('JSON array expected.')
+            buffer = buffer[1:]
+            started = True
+            continue
+        if started:
+            buffer = buffer.lstrip(', \t\r\n')
+            if buffer.startswith(']'):
+                return
+            if buffer:
+                try:
+                    item, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    yield item
+                    buffer = buffer[end:]
+                    continue
+        if eof:
+            raise ValueError('Unexpected end of JSON array.')
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class IngredientImporter:
+    """Writes (name, measurement_unit) rows in batches.
+
+    New rows are inserted, rows already in the catalog are skipped. On
+    PostgreSQL a batch is sent with COPY into a temporary table and
+    inserted with ON CONFLICT DO NOTHING, elsewhere it goes through
+    bulk_create(ignore_conflicts=True). In upsert mode a row whose name
+    has a single ingredient in both the batch and the catalog updates
+    the measurement unit of that ingredient instead of adding another
+    one. The whole run is one transaction.
+    """
+    table = 'ingredient_import'
+
+    def __init__(self, batch_size=1000, dry_run=False, upsert=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.upsert = upsert
+        self.use_copy = connection.vendor == 'postgresql'
+        self.read = self.updated = 0
+
+    def run(self, rows):
+        started = time.monotonic()
+        with transaction.atomic():
+            before = Ingredient.objects.count()
+            if self.use_copy:
+                self.create_table()
+            for batch in batched(rows, self.batch_size):
+                batch = [
+                    (row['name'].strip(), row['measurement_unit'].strip())
+                    for row in batch
+                ]
+                self.read += len(batch)
+                self.write_batch(list(dict.fromkeys(batch)))
+            inserted = Ingredient.objects.count() - before
+            if self.dry_run:
+                transaction.set_rollback(True)
+        if not self.dry_run and (inserted or self.updated):
+            bump_version(INGREDIENTS_VERSION)
+            bump_version(RECIPES_VERSION)
+        seconds = time.monotonic() - started
+        return {
+            'read': self.read,
+            'inserted': inserted,
+            'updated': self.updated,
+            'skipped': self.read - inserted - self.updated,
+            'seconds': seconds,
+            'rows_per_second': self.read / seconds if seconds else 0,
+        }
+
+    def write_batch(self, batch):
+        if self.use_copy:
+            self.copy_batch(batch)
+            return
+        if self.upsert:
+            self.update_units(batch)
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name, measurement_unit=measurement_unit)
+                for name, measurement_unit in batch
+            ),
+            ignore_conflicts=True
+        )
+
+    def update_units(self, batch):
+        units = {}
+        for name, measurement_unit in batch:
+            units.setdefault(name, []).append(measurement_unit)
+        existing = {}
+        for ingredient in Ingredient.objects.filter(name__in=units):
+            existing.setdefault(ingredient.name, []).append(ingredient)
+        changed = []
+        for name, ingredients in existing.items():
+            if len(ingredients) != 1 or len(units[name]) != 1:
+                continue
+            ingredient = ingredients[0]
+            if ingredient.measurement_unit != units[name][0]:
+                ingredient.measurement_unit = units[name][0]
+                changed.append(ingredient)
+        Ingredient.objects.bulk_update(changed, ['measurement_unit'])
+        self.updated += len(changed)
+
+    def create_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {self.table} '
+                '(name varchar(200), measurement_unit varchar(200)) '
+                'ON COMMIT DROP'
+            )
+
+    def copy_batch(self, batch):
+        data = StringIO()
+        csv.writer(data).writerows(batch)
+        data.seek(0)
+        ingredients = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {self.table} (name, measurement_unit) '
+                'FROM STDIN WITH (FORMAT csv)',
+                data
+            )
+            if self.upsert:
+                cursor.execute(f'''
+                    UPDATE {ingredients} AS i
+                    SET measurement_unit = t.measurement_unit
+                    FROM {self.table} AS t
+                    WHERE i.name = t.name
+                    AND i.measurement_unit <> t.measurement_unit
+                    AND (SELECT count(*) FROM {ingredients} AS c
+                         WHERE c.name = t.name) = 1
+                    AND (SELECT count(*) FROM {self.table} AS c
+                         WHERE c.name = t.name) = 1
+                ''')
+                self.updated += cursor.rowcount
+            cursor.execute(f'''
+                INSERT INTO {ingredients} (name, measurement_unit)
+                SELECT name, measurement_unit FROM {self.table}
+                ON CONFLICT (name, measurement_unit) DO NOTHING
+            ''')
+            cursor.execute(f'TRUNCATE {self.table}')
+
+
+def add_import_arguments(parser):
+    parser.add_argument(
+        '--batch-size', type=int, default=1000,
+        help='Rows written per batch.'
+    )
+    parser.add_argument(
+        '--dry-run', action='store_true',
+        help='Report what would change and roll back.'
+    )
+    parser.add_argument(
+        '--upsert', action='store_true',
+        help='Update the unit of ingredients known under a single unit.'
+    )
+
+
+def import_ingredients(rows, filename, options):
+    stats = IngredientImporter(
+        batch_size=options['batch_size'],
+        dry_run=options['dry_run'],
+        upsert=options['upsert'],
+    ).run(rows)
+    prefix = 'Dry run: ' if options['dry_run'] else ''
+    print(
+        f'{prefix}From file {filename} read {stats["read"]} rows: '
+        f'inserted {stats["inserted"]}, updated {stats["updated"]}, '
+        f'skipped {stats["skipped"]} in {stats["seconds"]:.2f} s '
+        f'({stats["rows_per_second"]:.0f} rows/s).'
+    )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from dishes import feed
+from dishes.models import FeedItem
+from users.models import Follow
+
+
+class Command(BaseCommand):
+    """Copies recipes of followed authors into feeds of their followers,
+    for follows created before feeds existed or outside the API (bulk
+    imports, the seed command), after marking popular authors anew. Safe
+    to run again: rows already in a feed are kept."""
+
+    help = 'Fills recipe feeds from existing follows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Followers filled per transaction.'
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete all feed rows first.'
+        )
+
+    def handle(self, *args, **options):
+        feed.update_popular_authors()
+        if options['clear']:
+            FeedItem.objects.all().delete()
+        users = Follow.objects.aggregate(first=Min('user'), last=Max('user'))
+        if users['first'] is None:
+            print('No follows, feeds are empty.')
+            return
+        added = 0
+        batch_size = options['batch_size']
+        for first in range(users['first'], users['last'] + 1, batch_size):
+            with transaction.atomic():
+                added += feed.backfill(first, first + batch_size - 1)
+        print(f'Added {added} feed items.')
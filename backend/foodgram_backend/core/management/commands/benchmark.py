@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+
+from core.benchmarks import SCENARIOS, Benchmark, PostmanCollection
+from core.seeding import Seeder
+
+COLLECTION = (
+    settings.BASE_DIR.parent.parent
+    / 'postman-collection' / 'diploma.postman_collection.json'
+)
+
+
+class Command(BaseCommand):
+    """Seeds a test database and replays scenarios built from requests
+    of the Postman collection, reporting latency percentiles and SQL
+    queries per request. The database backend is the configured one, so
+    DB_ENGINE=django.db.backends.sqlite3 benchmarks SQLite."""
+
+    help = 'Replays Postman scenarios against a seeded test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', choices=list(SCENARIOS),
+            help='Scenario to replay, may be repeated (default: all).'
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=50,
+            help='Recorded passes over every scenario.'
+        )
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Seed of the dataset and of the replay.'
+        )
+        parser.add_argument(
+            '--collection', default=str(COLLECTION),
+            help='Path to the Postman collection.'
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Reuse the test database instead of recreating it.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            collection = PostmanCollection(options['collection'])
+        except OSError as error:
+            raise CommandError(f'Cannot read the collection: {error}')
+        scenarios = options['scenario'] or list(SCENARIOS)
+        setup_test_environment()
+        name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb']
+        )
+        try:
+            call_command('flush', interactive=False, verbosity=0)
+            Seeder(options['users'], options['recipes'],
+                   seed=options['seed']).run()
+            benchmark = Benchmark(collection, scenarios, options['seed'])
+            benchmark.run(options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(
+                name, verbosity=0, keepdb=options['keepdb']
+            )
+            teardown_test_environment()
+        print(
+            f'{connection.vendor}: {options["users"]} users, '
+            f'{options["recipes"]} recipes, '
+            f'{options["iterations"]} iterations'
+        )
+        print(
+            f'{"request":<72} {"n":>5} {"err":>4} {"p50":>7} {"p95":>7} '
+            f'{"p99":>7} {"sql":>5} {"max":>4}'
+        )
+        for row in benchmark.report():
+            print(
+                f'{row["scenario"] + ": " + row["request"]:<72} '
+                f'{row["count"]:>5} {row["errors"]:>4} '
+                f'{row["p50"]:>7.1f} {row["p95"]:>7.1f} {row["p99"]:>7.1f} '
+                f'{row["queries"]:>5.1f} {row["max_queries"]:>4}'
+            )
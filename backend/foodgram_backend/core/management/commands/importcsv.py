@@ -4,15 +4,13 @@ from csv import DictReader
 from django.core.management.base import BaseCommand
 from django.conf import settings
 
-from dishes.models import Ingredient
+from core.importers import FIELDS, add_import_arguments, import_ingredients
 
 
 DATAFILES_DIR = os.path.join(settings.BASE_DIR, 'data')
 
 FILENAME = 'ingredients.csv'
 
-FIELDS = ['name', 'measurement_unit']
-
 
 class Command(BaseCommand):
     """If you need to reload the data from the CSV file,
@@ -20,14 +18,10 @@ class Command(BaseCommand):
 
     help = 'Loads data from csv files to models'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        add_import_arguments(parser)
+
+    def handle(self, *args, **options):
         path_to_file = os.path.join(DATAFILES_DIR, FILENAME)
         with open(path_to_file, newline='', encoding='utf8') as csvfile:
-            created = 0
-            for row in DictReader(csvfile, FIELDS):
-                obj, create = Ingredient.objects.get_or_create(**row)
-                created += create
-            print(
-                f'From file {FILENAME} created '
-                f'{created} objects.'
-            )
+            import_ingredients(DictReader(csvfile, FIELDS), FILENAME, options)
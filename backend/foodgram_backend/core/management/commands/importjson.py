@@ -1,10 +1,11 @@
 import os
-import json
 
 from django.core.management.base import BaseCommand
 from django.conf import settings
 
-from dishes.models import Ingredient
+from core.importers import (
+    add_import_arguments, import_ingredients, iter_json_array
+)
 
 
 DATAFILES_DIR = os.path.join(settings.BASE_DIR, 'data')
@@ -18,14 +19,12 @@ class Command(BaseCommand):
 
     help = 'Loads data from csv files to models'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        add_import_arguments(parser)
+
+    def handle(self, *args, **options):
         path_to_file = os.path.join(DATAFILES_DIR, FILENAME)
         with open(path_to_file, encoding='utf8') as json_file:
-            created = 0
-            for row in json.load(json_file):
-                obj, create = Ingredient.objects.get_or_create(**row)
-                created += create
-            print(
-                f'From file {FILENAME} created '
-                f'{created} objects.'
+            import_ingredients(
+                iter_json_array(json_file), FILENAME, options
             )
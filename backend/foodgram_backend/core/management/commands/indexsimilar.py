@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from dishes.models import Recipe
+from dishes.similar import index_recipes
+
+
+class Command(BaseCommand):
+    """Rebuilds the similar recipes index, e.g. after bulk imports or a
+    change of its parameters. Recipes written through the API are
+    indexed as they are saved."""
+
+    help = 'Rebuilds the ingredient similarity index of recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Recipes indexed per transaction.'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.order_by('pk').values_list('pk', flat=True)
+        last = 0
+        indexed = 0
+        while True:
+            batch = list(
+                recipes.filter(pk__gt=last)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            index_recipes(batch)
+            indexed += len(batch)
+            last = batch[-1]
+        print(f'Indexed {indexed} recipes.')
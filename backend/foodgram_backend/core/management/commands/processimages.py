@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from dishes.images import process_image
+from dishes.models import Recipe
+
+
+class Command(BaseCommand):
+    """Renders image variants of recipes left pending (existing recipes,
+    full processing queue) or failed, in this process."""
+
+    help = 'Renders downscaled WebP variants of recipe images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Render variants of every recipe, e.g. after new sizes.'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.exclude(image_status=Recipe.IMAGE_READY)
+        processed = 0
+        for pk in recipes.values_list('pk', flat=True).iterator():
+            process_image(pk)
+            processed += 1
+        print(f'Processed images of {processed} recipes.')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from dishes.pantry import prune_changes
+
+
+class Command(BaseCommand):
+    """Deletes ingredient changes logged for pantry indexes once they are
+    older than PANTRY_CHANGES_TTL. Meant to be run periodically (e.g.
+    daily from cron) to keep the log from growing without bound."""
+
+    help = 'Deletes old ingredient changes of pantry indexes'
+
+    def handle(self, *args, **options):
+        print(f'Deleted {prune_changes()} ingredient changes.')
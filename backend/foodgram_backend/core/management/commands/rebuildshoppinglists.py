@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from dishes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    """Recomputes the materialized shopping lists from the carts, for
+    carts changed outside the API and the admin (raw SQL, fixtures) or
+    drift of the ingredient deltas."""
+
+    help = 'Recomputes shopping lists of all users from their carts'
+
+    def handle(self, *args, **options):
+        print(f'Rebuilt {ShoppingListItem.objects.rebuild()} '
+              f'shopping list items.')
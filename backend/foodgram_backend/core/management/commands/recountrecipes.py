@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from dishes.models import Cart, Favorite, Recipe
+
+
+def count_of(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(recipe=OuterRef('pk')).values(
+                'recipe'
+            ).annotate(total=Count('pk')).values('total')
+        ),
+        0
+    )
+
+
+class Command(BaseCommand):
+    """Repairs drift of the denormalized favorites_count and
+    in_carts_count of recipes (e.g. after deletes from the admin)."""
+
+    help = 'Recomputes favorite and cart counters of recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report recipes with wrong counters.'
+        )
+
+    def handle(self, *args, **options):
+        ids = list(Recipe.objects.annotate(
+            actual_favorites=count_of(Favorite),
+            actual_carts=count_of(Cart),
+        ).filter(
+            ~Q(favorites_count=F('actual_favorites'))
+            | ~Q(in_carts_count=F('actual_carts'))
+        ).values_list('pk', flat=True))
+        if ids and not options['dry_run']:
+            Recipe.objects.filter(pk__in=ids).update(
+                favorites_count=count_of(Favorite),
+                in_carts_count=count_of(Cart),
+            )
+        action = 'found' if options['dry_run'] else 'fixed'
+        print(f'Counters {action} for {len(ids)} recipes.')
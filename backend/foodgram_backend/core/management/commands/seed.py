@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.seeding import Seeder
+
+
+class Command(BaseCommand):
+    """Adds synthetic users, recipes, favorites, carts and follows,
+    e.g. `seed --users 100000 --recipes 1000000 --workers 4`. The same
+    --seed gives the same data on an empty database."""
+
+    help = 'Generates a synthetic dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--favorites', type=int, default=10,
+            help='Mean favorites per user.'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=3,
+            help='Mean recipes in the cart of a user.'
+        )
+        parser.add_argument(
+            '--follows', type=int, default=5,
+            help='Mean followed authors per user.'
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=1000,
+            help='Ingredients to create when the catalog is empty.'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='Recipes are published over this many past days.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Processes writing chunks in parallel.'
+        )
+        parser.add_argument(
+            '--password', default='foodgram',
+            help='Password of the generated users.'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            print('SQLite allows a single writer, using one worker.')
+            workers = 1
+        counts = Seeder(
+            users=options['users'],
+            recipes=options['recipes'],
+            seed=options['seed'],
+            favorites=options['favorites'],
+            carts=options['carts'],
+            follows=options['follows'],
+            ingredients=options['ingredients'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+            workers=workers,
+            password=options['password'],
+        ).run()
+        seconds = counts.pop('seconds')
+        rows = sum(counts.values())
+        for table, count in counts.items():
+            print(f'{table}: {count}')
+        print(f'{rows} rows in {seconds:.1f} s ({rows / seconds:.0f} rows/s).')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from dishes.trending import update_scores
+
+
+class Command(BaseCommand):
+    """Adds favorites and cart additions made since the previous run to
+    the trending scores of recipes. Meant to be run periodically (e.g.
+    every few minutes from cron): the interval is the time resolution of
+    the ranking."""
+
+    help = 'Updates trending scores of recipes'
+
+    def handle(self, *args, **options):
+        updated, created, deleted = update_scores()
+        print(
+            f'Trending scores: {updated} updated, {created} created, '
+            f'{deleted} deleted.'
+        )
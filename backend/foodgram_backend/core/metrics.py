@@ -0,0 +1,252 @@
+import logging
+import time
+from contextvars import ContextVar
+from threading import Lock
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+TIME_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    """Cumulative Prometheus histogram labelled by endpoint."""
+
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, endpoint, value):
+        series = self.series.setdefault(
+            endpoint, [0] * len(self.buckets) + [0, 0]
+        )
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def expose(self):
+        yield f'# HELP {self.name} {self.description}'
+        yield f'# TYPE {self.name} histogram'
+        for endpoint, series in sorted(self.series.items()):
+            for bound, count in zip(self.buckets, series):
+                yield (f'{self.name}_bucket{{endpoint="{endpoint}",'
+                       f'le="{bound}"}} {count}')
+            yield (f'{self.name}_bucket{{endpoint="{endpoint}",'
+                   f'le="+Inf"}} {series[-1]}')
+            yield f'{self.name}_sum{{endpoint="{endpoint}"}} {series[-2]}'
+            yield f'{self.name}_count{{endpoint="{endpoint}"}} {series[-1]}'
+
+
+class Registry:
+    """Per-process request metrics. Every worker process keeps its own,
+    so each scrape describes the process that answered it."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.duration = Histogram(
+            'foodgram_request_duration_seconds',
+            'Time to build and render the response.', TIME_BUCKETS
+        )
+        self.db = Histogram(
+            'foodgram_request_db_seconds',
+            'Time spent executing SQL.', TIME_BUCKETS
+        )
+        self.serialize = Histogram(
+            'foodgram_request_serialize_seconds',
+            'Time spent serializing objects, SQL excluded.', TIME_BUCKETS
+        )
+        self.render = Histogram(
+            'foodgram_request_render_seconds',
+            'Time spent rendering the response body.', TIME_BUCKETS
+        )
+        self.queries = Histogram(
+            'foodgram_request_queries',
+            'SQL queries per request.', QUERY_BUCKETS
+        )
+        self.size = Histogram(
+            'foodgram_response_size_bytes',
+            'Size of non-streaming response bodies.', SIZE_BUCKETS
+        )
+        self.statuses = {}
+
+    def record(self, metrics, status, size):
+        with self.lock:
+            endpoint = metrics.endpoint
+            self.duration.observe(endpoint, metrics.total)
+            self.db.observe(endpoint, metrics.db)
+            self.serialize.observe(endpoint, metrics.serialize)
+            self.render.observe(endpoint, metrics.render)
+            self.queries.observe(endpoint, len(metrics.queries))
+            if size is not None:
+                self.size.observe(endpoint, size)
+            key = (endpoint, status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def expose(self):
+        with self.lock:
+            yield '# HELP foodgram_requests_total Requests by status code.'
+            yield '# TYPE foodgram_requests_total counter'
+            for (endpoint, status), count in sorted(self.statuses.items()):
+                yield (f'foodgram_requests_total{{endpoint="{endpoint}",'
+                       f'status="{status}"}} {count}')
+            for histogram in (self.duration, self.db, self.serialize,
+                              self.render, self.queries, self.size):
+                yield from histogram.expose()
+
+
+registry = Registry()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.endpoint = 'unresolved'
+        self.queries = []
+        self.db = self.serialize = self.render = self.total = 0
+
+    def add_query(self, sql, duration):
+        self.db += duration
+        self.queries.append((sql, duration))
+
+    @property
+    def app(self):
+        return self.total - self.db - self.serialize - self.render
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper, see core.signals."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+def render(response):
+    """Renders a template (DRF) response, timing it for the metrics of
+    the current request."""
+    if not callable(getattr(response, 'render', None)):
+        return response
+    if response.is_rendered:
+        return response
+    started = time.perf_counter()
+    response.render()
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.render += time.perf_counter() - started
+    return response
+
+
+def serialize(serializer):
+    """serializer.data, timed for the metrics of the current request.
+    SQL run by lazy fields meanwhile is left to the db time."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return serializer.data
+    started = time.perf_counter()
+    db = metrics.db
+    try:
+        return serializer.data
+    finally:
+        metrics.serialize += (
+            time.perf_counter() - started - (metrics.db - db)
+        )
+
+
+class SerializeMetricsMixin:
+    """List and retrieve of DRF viewsets with serializer.data timed,
+    see serialize()."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serialize(serializer))
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serialize(serializer))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(serialize(self.get_serializer(self.get_object())))
+
+
+def get_endpoint(view_func, method):
+    """ViewSet.action for DRF views, the function name otherwise."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    return f'{view_class.__name__}.{actions.get(method, method)}'
+
+
+class RequestMetricsMiddleware(MiddlewareMixin):
+    """Per-request SQL count, database, serialize, render and total time.
+
+    Sent to the client in a Server-Timing header, aggregated per
+    endpoint (viewset action) for /api/metrics/ and logged together
+    with the SQL of requests slower than SLOW_REQUEST_SECONDS. Should be
+    first in MIDDLEWARE so that it renders the response last. Streaming
+    bodies are produced after the response is recorded, their queries
+    are not counted.
+    """
+
+    def process_request(self, request):
+        request.metrics = RequestMetrics()
+        current_metrics.set(request.metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics.endpoint = get_endpoint(
+            view_func, request.method.lower()
+        )
+
+    def process_template_response(self, request, response):
+        return render(response)
+
+    def process_response(self, request, response):
+        metrics = getattr(request, 'metrics', None)
+        if metrics is None:
+            return response
+        current_metrics.set(None)
+        metrics.total = time.perf_counter() - metrics.started
+        size = None if response.streaming else len(response.content)
+        registry.record(metrics, response.status_code, size)
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={metrics.db * 1000:.1f};'
+            f'desc="{len(metrics.queries)} queries"',
+            f'serialize;dur={metrics.serialize * 1000:.1f}',
+            f'render;dur={metrics.render * 1000:.1f}',
+            f'app;dur={metrics.app * 1000:.1f}',
+            f'total;dur={metrics.total * 1000:.1f}',
+        ))
+        if metrics.total >= settings.SLOW_REQUEST_SECONDS:
+            self.log_slow(request, metrics)
+        return response
+
+    def log_slow(self, request, metrics):
+        statements = '\n'.join(
+            f'  {duration * 1000:8.1f} ms  {sql}'
+            for sql, duration in metrics.queries[:settings.SLOW_REQUEST_SQL]
+        )
+        logger.warning(
+            'Slow request %s %s (%s): %.0f ms, %d queries, db %.0f ms, '
+            'serialize %.0f ms, render %.0f ms\n%s',
+            request.method, request.get_full_path(), metrics.endpoint,
+            metrics.total * 1000, len(metrics.queries), metrics.db * 1000,
+            metrics.serialize * 1000, metrics.render * 1000, statements
+        )
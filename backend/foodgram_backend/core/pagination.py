@@ -1,5 +1,145 @@
+import datetime
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps the microseconds of datetimes, which DjangoJSONEncoder cuts
+    down to milliseconds: seeking from a truncated value would skip the
+    rows later in the same millisecond."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def seek_filter(ordering, position):
+    """(a, b) < (x, y) spelled out as a < x OR (a = x AND b < y) for the
+    ordering fields and their values in the last seen row.
+
+    The leading a <= x term keeps the range seekable by the composite
+    index on the ordering fields."""
+    first = ordering[0]
+    lookup = 'lte' if first.startswith('-') else 'gte'
+    seek = Q()
+    equal = Q()
+    for field, value in zip(ordering, position):
+        name = field.lstrip('-')
+        lookup_name = 'lt' if field.startswith('-') else 'gt'
+        seek |= equal & Q(**{f'{name}__{lookup_name}': value})
+        equal &= Q(**{name: value})
+    return Q(**{f'{first.lstrip("-")}__{lookup}': position[0]}) & seek
 
 
 class LimitNumberPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class LimitCursorPagination(LimitNumberPagination):
+    """Page/limit pagination with an opt-in keyset (cursor) mode.
+
+    Requests carrying a `cursor` parameter (`?cursor=` for the first page)
+    are paginated by seeking past the last seen `cursor_ordering` values
+    of the view, without COUNT(*) and OFFSET. Other requests keep the
+    page/limit contract.
+    """
+    cursor_query_param = 'cursor'
+    ordering = ('-pub_date', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.keyset = False
+            return super().paginate_queryset(queryset, request, view)
+        self.ordering = self.get_ordering(queryset, view)
+        queryset = queryset.order_by(*self.ordering)
+
+        def get_rows(position, limit):
+            if position is None:
+                return list(queryset[:limit])
+            return list(queryset.filter(
+                seek_filter(self.ordering, position)
+            )[:limit])
+        return self.paginate_rows(get_rows, queryset.model, request)
+
+    def paginate_rows(self, get_rows, model, request):
+        """Keyset page of rows read by `get_rows(position, limit)`: at
+        most `limit` objects of the model in `self.ordering` after the
+        given ordering values (from the start for None)."""
+        self.keyset = True
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request, model)
+        results = get_rows(position, self.page_size + 1)
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_ordering(self, queryset, view):
+        """Explicit ordering of the queryset by model fields (e.g. set by
+        a filter) wins over the default `cursor_ordering` of the view."""
+        ordering = queryset.query.order_by
+        field_names = {
+            field.name for field in queryset.model._meta.concrete_fields
+        }
+        if ordering and all(
+            isinstance(field, str) and field.lstrip('-') in field_names
+            for field in ordering
+        ):
+            return tuple(ordering)
+        return getattr(view, 'cursor_ordering', self.ordering)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        position = [
+            getattr(last, field.lstrip('-')) for field in self.ordering
+        ]
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(position)
+        )
+
+    def encode_cursor(self, position):
+        data = json.dumps(position, cls=CursorEncoder)
+        return b64encode(data.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(b64decode(encoded.encode('ascii')))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (
+            BinasciiError, UnicodeError, ValueError, TypeError,
+            ValidationError
+        ):
+            raise NotFound(self.invalid_cursor_message)
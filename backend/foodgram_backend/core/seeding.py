@@ -0,0 +1,289 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import (
+    DateTimeField, DurationField, ExpressionWrapper, F, Max, Value
+)
+from django.utils import timezone
+
+from core.versions import bump_version
+from dishes.models import (
+    Cart, Favorite, Ingredient, IngredientInRecipe, Recipe, ShoppingListItem,
+    Tag
+)
+from dishes.pantry import PANTRY_VERSION
+from dishes.signals import INGREDIENTS_VERSION, RECIPES_VERSION, TAGS_VERSION
+from users.models import Follow, User
+
+# Odd prime used to scatter popularity ranks over ids, see Seeder.pick.
+STRIDE = 2654435761
+
+TAGS = [
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+    ('Десерт', '#F2C94C', 'dessert'),
+    ('Выпечка', '#B5651D', 'bakery'),
+    ('Салат', '#27AE60', 'salad'),
+    ('Суп', '#2D9CDB', 'soup'),
+    ('Вегетарианское', '#6FCF97', 'vegetarian'),
+]
+UNITS = ['г', 'мл', 'шт.', 'ст. л.', 'ч. л.', 'по вкусу']
+
+
+def power_law_rank(rng, size, exponent):
+    """Rank in [0, size) drawn with probability ~ 1 / (rank + 1) ** exponent,
+    by inverting the continuous distribution (no tables needed)."""
+    if exponent == 1:
+        value = size ** rng.random()
+    else:
+        power = 1 - exponent
+        value = ((size ** power - 1) * rng.random() + 1) ** (1 / power)
+    return min(int(value) - 1, size - 1)
+
+
+def pareto_count(rng, mean, limit):
+    """Heavy-tailed count with the given mean: most users do a little,
+    a few do a lot."""
+    return min(int(mean / 3 * rng.paretovariate(1.5)), limit)
+
+
+class Seeder:
+    """Generates a synthetic dataset on top of the existing data.
+
+    New users and recipes get explicit ids after the current maximum, so
+    every chunk of rows is a pure function of the seed and the chunk
+    number and chunks can be written by parallel worker processes in any
+    order. Recipe authors, favorites, carts and follows are drawn from
+    power-law (Zipf-like) popularity, as are tags and ingredients of
+    recipes. Recipes are published over the last `days` days.
+    """
+    chunk_size = 10000
+
+    def __init__(self, users, recipes, seed=0, favorites=10, carts=3,
+                 follows=5, ingredients=1000, days=365, batch_size=5000,
+                 workers=1, password='foodgram'):
+        self.users = users
+        self.recipes = recipes
+        self.seed = seed
+        self.favorites = favorites
+        self.carts = carts
+        self.follows = follows
+        self.ingredients = ingredients
+        self.days = days
+        self.batch_size = batch_size
+        self.workers = workers
+        self.password = password
+        self.counts = {}
+
+    def rng(self, phase, chunk):
+        return random.Random(f'{self.seed}:{phase}:{chunk}')
+
+    def pick(self, rng, first, size, exponent):
+        """Id in [first, first + size) by popularity rank. Ranks are
+        scattered so that popular rows are not just the oldest ones."""
+        rank = power_law_rank(rng, size, exponent)
+        return first + rank * STRIDE % size
+
+    def run(self):
+        started = time.monotonic()
+        self.prepare()
+        for phase in ('users', 'recipes', 'activity'):
+            total = self.users if phase != 'recipes' else self.recipes
+            chunks = range(math.ceil(total / self.chunk_size))
+            if self.workers > 1:
+                connections.close_all()
+                with ProcessPoolExecutor(self.workers) as executor:
+                    results = list(executor.map(
+                        self.write_chunk, [phase] * len(chunks), chunks
+                    ))
+            else:
+                results = [self.write_chunk(phase, chunk) for chunk in chunks]
+            for counts in results:
+                for table, rows in counts.items():
+                    self.counts[table] = self.counts.get(table, 0) + rows
+        self.finish()
+        self.counts['seconds'] = time.monotonic() - started
+        return self.counts
+
+    def prepare(self):
+        """Tags and ingredients (existing ones are used when present) and
+        the id ranges of the new rows."""
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in TAGS
+            )
+        if not Ingredient.objects.exists():
+            rng = self.rng('ingredients', 0)
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=f'ингредиент {number}',
+                               measurement_unit=rng.choice(UNITS))
+                    for number in range(self.ingredients)
+                ),
+                batch_size=self.batch_size
+            )
+        self.tag_ids = sorted(Tag.objects.values_list('id', flat=True))
+        self.ingredient_ids = sorted(
+            Ingredient.objects.values_list('id', flat=True)
+        )
+        self.first_user = (
+            User.objects.aggregate(last=Max('id'))['last'] or 0
+        ) + 1
+        self.first_recipe = (
+            Recipe.objects.aggregate(last=Max('id'))['last'] or 0
+        ) + 1
+        self.password_hash = make_password(self.password)
+
+    def write_chunk(self, phase, chunk):
+        first = chunk * self.chunk_size
+        last = min(first + self.chunk_size,
+                   self.recipes if phase == 'recipes' else self.users)
+        rng = self.rng(phase, chunk)
+        with transaction.atomic():
+            counts = getattr(self, f'write_{phase}')(rng, first, last)
+        return counts
+
+    def bulk_create(self, model, rows):
+        model.objects.bulk_create(
+            rows, batch_size=self.batch_size, ignore_conflicts=True
+        )
+        return len(rows)
+
+    def write_users(self, rng, first, last):
+        users = []
+        for number in range(first, last):
+            pk = self.first_user + number
+            users.append(User(
+                pk=pk, username=f'user{pk}', email=f'user{pk}@example.org',
+                first_name=rng.choice(('Анна', 'Иван', 'Мария', 'Олег')),
+                last_name=f'Пользователь {pk}', password=self.password_hash
+            ))
+        return {'users': self.bulk_create(User, users)}
+
+    def write_recipes(self, rng, first, last):
+        recipes = []
+        tags = []
+        amounts = []
+        for number in range(first, last):
+            pk = self.first_recipe + number
+            recipes.append(Recipe(
+                pk=pk, name=f'Рецепт {pk}',
+                text='Нарезать, смешать и приготовить.',
+                author_id=self.pick(rng, self.first_user, self.users, 1.1),
+                cooking_time=rng.choice((10, 15, 20, 30, 45, 60, 90, 120)),
+            ))
+            tag_count = rng.choices((1, 2, 3), weights=(50, 35, 15))[0]
+            for tag in {
+                self.tag_ids[power_law_rank(rng, len(self.tag_ids), 0.8)]
+                for _ in range(tag_count)
+            }:
+                tags.append(Recipe.tags.through(recipe_id=pk, tag_id=tag))
+            size = max(1, min(20, round(rng.gauss(8, 3))))
+            for ingredient in {
+                self.ingredient_ids[
+                    power_law_rank(rng, len(self.ingredient_ids), 1.0)
+                ]
+                for _ in range(size)
+            }:
+                amounts.append(IngredientInRecipe(
+                    recipe_id=pk, ingredient_id=ingredient,
+                    amount=rng.choice((1, 2, 5, 10, 50, 100, 200, 500))
+                ))
+        return {
+            'recipes': self.bulk_create(Recipe, recipes),
+            'recipe tags': self.bulk_create(Recipe.tags.through, tags),
+            'recipe ingredients': self.bulk_create(
+                IngredientInRecipe, amounts
+            ),
+        }
+
+    def write_activity(self, rng, first, last):
+        favorites = []
+        carts = []
+        follows = []
+        for number in range(first, last):
+            user = self.first_user + number
+            for model, rows, mean in ((Favorite, favorites, self.favorites),
+                                      (Cart, carts, self.carts)):
+                count = pareto_count(rng, mean, self.recipes // 2)
+                for recipe in {
+                    self.pick(rng, self.first_recipe, self.recipes, 1.0)
+                    for _ in range(count)
+                }:
+                    rows.append(model(user_id=user, recipe_id=recipe))
+            count = pareto_count(rng, self.follows, self.users // 2)
+            for author in {
+                self.pick(rng, self.first_user, self.users, 1.1)
+                for _ in range(count)
+            } - {user}:
+                follows.append(Follow(user_id=user, following_id=author))
+        return {
+            'favorites': self.bulk_create(Favorite, favorites),
+            'carts': self.bulk_create(Cart, carts),
+            'follows': self.bulk_create(Follow, follows),
+        }
+
+    def spread_pub_dates(self):
+        """bulk_create stamps recipes with the time of writing (auto_now_add),
+        so one UPDATE spreads them over the last `days` days instead: newer
+        ids are newer, give or take a day of jitter drawn from the id and
+        the seed."""
+        last = self.first_recipe + self.recipes - 1
+        step = self.days * 24 * 3600 * 10 ** 6 // max(self.recipes, 1)
+        jitter = min(self.days, 1) * 24 * 3600 * 10 ** 6 or 1
+        # Microseconds before now.
+        offset = (
+            (last - F('id')) * step
+            + (F('id') + self.seed) * STRIDE % jitter
+        )
+        if connection.features.has_native_duration_field:
+            offset = offset * Value(timedelta(microseconds=1))
+        return Recipe.objects.filter(
+            id__gte=self.first_recipe, id__lte=last
+        ).update(pub_date=ExpressionWrapper(
+            Value(timezone.now(), output_field=DateTimeField())
+            - ExpressionWrapper(offset, output_field=DurationField()),
+            output_field=DateTimeField()
+        ))
+
+    def finish(self):
+        """Publication dates, sequences, denormalized counters, shopping
+        lists, feeds, the similar recipes index and cached data versions
+        (including the one of pantry indexes)."""
+        self.spread_pub_dates()
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [User, Recipe]
+            ):
+                cursor.execute(sql)
+        call_command('recountrecipes')
+        users = (self.first_user, self.first_user + self.users - 1)
+        ShoppingListItem.objects.filter(
+            user__gte=users[0], user__lte=users[1]
+        ).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f'''
+                INSERT INTO {ShoppingListItem._meta.db_table}
+                    (user_id, ingredient_id, amount)
+                SELECT c.user_id, i.ingredient_id, SUM(i.amount)
+                FROM {Cart._meta.db_table} AS c
+                JOIN {IngredientInRecipe._meta.db_table} AS i
+                ON i.recipe_id = c.recipe_id
+                WHERE c.user_id BETWEEN %s AND %s
+                GROUP BY c.user_id, i.ingredient_id
+            ''', users)
+            self.counts['shopping list items'] = cursor.rowcount
+        call_command('backfillfeed')
+        call_command('indexsimilar')
+        for name in (INGREDIENTS_VERSION, TAGS_VERSION, RECIPES_VERSION,
+                     PANTRY_VERSION):
+            bump_version(name)
@@ -0,0 +1,29 @@
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'version:{}'
+
+
+def get_version(name):
+    """Version stamp of a data set, shared by processes through the cache.
+
+    A missing stamp (cold or flushed cache) is replaced by a fresh
+    time-based one, so stale copies never match it by accident."""
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(name):
+    key = VERSION_KEY.format(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
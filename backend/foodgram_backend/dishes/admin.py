@@ -1,7 +1,10 @@
 from django.contrib import admin
 
+from .changes import change_ingredients
+from .images import schedule_image_processing
 from .models import (
-    Tag, Ingredient, Recipe, IngredientInRecipe, Favorite, Cart
+    Tag, Ingredient, Recipe, IngredientInRecipe, Favorite, Cart,
+    ShoppingListItem
 )
 
 DEFAULT_EMPTY_VALUE = '-empty-'
@@ -27,11 +30,29 @@ class RecipeAdmin(admin.ModelAdmin):
         'pk',
         'name',
         'cooking_time',
-        'author'
+        'author',
+        'favorites_count',
+        'in_carts_count',
+        'image_status'
     )
     filter_horizontal = ('tags',)
     inlines = (RecipeIngredientInline,)
 
+    def save_model(self, request, obj, form, change):
+        if 'image' in form.changed_data:
+            obj.image_status = Recipe.IMAGE_PENDING
+        super().save_model(request, obj, form, change)
+        if 'image' in form.changed_data:
+            schedule_image_processing(obj.pk)
+
+    def save_formset(self, request, form, formset, change):
+        recipe = form.instance
+        old_amounts = dict(
+            recipe.amount_recipes.values_list('ingredient', 'amount')
+        )
+        super().save_formset(request, form, formset, change)
+        change_ingredients(recipe, old_amounts)
+
 
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = (
@@ -42,12 +63,33 @@ class FavoriteAdmin(admin.ModelAdmin):
 
 
 class CartAdmin(admin.ModelAdmin):
+    """Applies cart rows added, edited or deleted here to the shopping
+    lists of their users."""
     list_display = (
         'pk',
         'recipe',
         'user'
     )
 
+    def save_model(self, request, obj, form, change):
+        if change:
+            self.remove_from_shopping_list(Cart.objects.get(pk=obj.pk))
+        super().save_model(request, obj, form, change)
+        ShoppingListItem.objects.add_recipes(obj.user, [obj.recipe_id])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.remove_from_shopping_list(obj)
+
+    def delete_queryset(self, request, queryset):
+        carts = list(queryset)
+        super().delete_queryset(request, queryset)
+        for cart in carts:
+            self.remove_from_shopping_list(cart)
+
+    def remove_from_shopping_list(self, cart):
+        ShoppingListItem.objects.remove_recipes(cart.user, [cart.recipe_id])
+
 
 admin.site.register(Tag, TagAdmin)
 admin.site.register(Ingredient, IngredientAdmin)
@@ -0,0 +1,20 @@
+"""Upkeep after the ingredients of an existing recipe change, shared by
+the API and the admin: shopping lists of the carts holding the recipe,
+the similar recipes index and the change log of pantry indexes.
+"""
+from .models import ShoppingListItem
+from .pantry import log_changes
+from .similar import index_recipes
+
+
+def change_ingredients(recipe, old_amounts, new_amounts=None):
+    """old_amounts and new_amounts map ingredient ids to amounts, the new
+    ones are read from the database when omitted."""
+    if new_amounts is None:
+        new_amounts = dict(
+            recipe.amount_recipes.values_list('ingredient', 'amount')
+        )
+    ShoppingListItem.objects.change_recipe(recipe, old_amounts, new_amounts)
+    if old_amounts.keys() != new_amounts.keys():
+        index_recipes([recipe.pk])
+        log_changes([recipe.pk])
@@ -0,0 +1,174 @@
+"""Feeds of recipes of followed authors.
+
+Publishing a recipe writes a FeedItem row for every follower of its
+author (fan-out on write), so a page of the feed is one index range scan
+no matter how many authors the user follows. Authors who reach
+FEED_FANOUT_LIMIT followers are marked popular (PopularAuthor) and not
+fanned out: their recipes are read from the recipe table when the feed
+is requested (fan-out on read) and merged with the stored rows. The mark
+is dropped once the author falls below FEED_FANOUT_LOWER_LIMIT
+followers, which copies the latest recipes of the author, those
+published while popular included, into the feeds of the followers.
+Following an author (and the backfill) copies only the latest
+FEED_AUTHOR_HISTORY recipes of the author.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+
+from core.pagination import seek_filter
+from users.models import Follow
+from .models import FeedItem, PopularAuthor, Recipe
+
+NOT_POPULAR = f'''NOT EXISTS (
+    SELECT 1 FROM {PopularAuthor._meta.db_table} AS p
+    WHERE p.author_id = {{}}
+)'''
+
+
+def count_followers(author_id, limit):
+    """Followers of the author, counted up to `limit` only."""
+    return Follow.objects.filter(
+        following=author_id
+    ).values('pk')[:limit].count()
+
+
+def update_popularity(author_id):
+    """Marks the author popular on reaching FEED_FANOUT_LIMIT followers,
+    unmarks below FEED_FANOUT_LOWER_LIMIT and then fills the feeds of the
+    followers. Returns whether the author is popular."""
+    if not PopularAuthor.objects.filter(author=author_id).exists():
+        limit = settings.FEED_FANOUT_LIMIT
+        if count_followers(author_id, limit) < limit:
+            return False
+        PopularAuthor.objects.bulk_create(
+            [PopularAuthor(author_id=author_id)], ignore_conflicts=True
+        )
+        return True
+    limit = settings.FEED_FANOUT_LOWER_LIMIT
+    if count_followers(author_id, limit) >= limit:
+        return True
+    with transaction.atomic():
+        PopularAuthor.objects.filter(author=author_id).delete()
+        fill('f.following_id = %s', [author_id])
+    return False
+
+
+def update_popular_authors():
+    """Marks and unmarks all authors by their followers, for follows
+    written without signals (bulk imports, the seed command). Feeds of
+    followers of unmarked authors are left to the backfill."""
+    counts = Follow.objects.values('following').annotate(
+        followers=Count('pk')
+    )
+    popular = set(PopularAuthor.objects.values_list('author', flat=True))
+    PopularAuthor.objects.bulk_create(
+        (
+            PopularAuthor(author_id=author)
+            for author in counts.filter(
+                followers__gte=settings.FEED_FANOUT_LIMIT
+            ).values_list('following', flat=True)
+            if author not in popular
+        ),
+        ignore_conflicts=True
+    )
+    kept = counts.filter(
+        following__in=popular,
+        followers__gte=settings.FEED_FANOUT_LOWER_LIMIT
+    ).values_list('following', flat=True)
+    return PopularAuthor.objects.filter(
+        author__in=popular - set(kept)
+    ).delete()[0]
+
+
+def insert(select, params):
+    """INSERT ... SELECT of (user_id, recipe_id, author_id, pub_date)
+    rows into feeds, keeping rows already there."""
+    statement = connection.ops.insert_statement(ignore_conflicts=True)
+    on_conflict = connection.ops.ignore_conflicts_suffix_sql(
+        ignore_conflicts=True
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'''
+            {statement} {FeedItem._meta.db_table}
+                (user_id, recipe_id, author_id, pub_date)
+            {select}
+            {on_conflict}
+        ''', params)
+        return cursor.rowcount
+
+
+def fan_out(recipe):
+    """Adds a new recipe to the feeds of the followers of its author,
+    unless the author is popular."""
+    return insert(f'''
+        SELECT f.user_id, r.id, r.author_id, r.pub_date
+        FROM {Follow._meta.db_table} AS f
+        JOIN {Recipe._meta.db_table} AS r ON r.author_id = f.following_id
+        WHERE r.id = %s AND {NOT_POPULAR.format('r.author_id')}
+    ''', [recipe.pk])
+
+
+def fill(condition, params):
+    """Copies the latest FEED_AUTHOR_HISTORY recipes of followed authors
+    into the feeds of the follows matching the SQL condition on `f`. An
+    author with thousands of recipes would otherwise cost thousands of
+    rows per follower."""
+    follows = Follow._meta.db_table
+    return insert(f'''
+        SELECT f.user_id, r.id, r.author_id, r.pub_date
+        FROM {follows} AS f
+        JOIN (
+            SELECT id, author_id, pub_date, ROW_NUMBER() OVER (
+                PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+            ) AS position
+            FROM {Recipe._meta.db_table}
+            WHERE author_id IN (
+                SELECT f.following_id FROM {follows} AS f WHERE {condition}
+            )
+        ) AS r ON r.author_id = f.following_id
+        WHERE {condition} AND r.position <= %s
+    ''', [*params, *params, settings.FEED_AUTHOR_HISTORY])
+
+
+def follow(user_id, author_id):
+    """Adds recipes of a newly followed author to the feed of the user."""
+    if update_popularity(author_id):
+        return 0
+    return fill(
+        'f.user_id = %s AND f.following_id = %s', [user_id, author_id]
+    )
+
+
+def unfollow(user_id, author_id):
+    FeedItem.objects.filter(user=user_id, author=author_id).delete()
+    update_popularity(author_id)
+
+
+def backfill(first_user, last_user):
+    """Feeds of users with ids in [first_user, last_user] from their
+    follows, skipping popular authors."""
+    return fill(
+        f'f.user_id BETWEEN %s AND %s '
+        f'AND {NOT_POPULAR.format("f.following_id")}',
+        [first_user, last_user]
+    )
+
+
+def get_feed(user, position, limit):
+    """Ids of at most `limit` recipes of the feed of the user, newest
+    first, published before `position` ((pub_date, id) of the last seen
+    recipe, None for the first page)."""
+    stored = FeedItem.objects.filter(user=user).order_by(
+        '-pub_date', '-recipe'
+    )
+    if position is not None:
+        stored = stored.filter(seek_filter(('-pub_date', '-recipe'), position))
+    rows = set(stored.values_list('pub_date', 'recipe')[:limit])
+    pulled = Recipe.objects.filter(author__in=user.follower.filter(
+        following__in=PopularAuthor.objects.values('author')
+    ).values('following')).order_by('-pub_date', '-id')
+    if position is not None:
+        pulled = pulled.filter(seek_filter(('-pub_date', '-id'), position))
+    rows.update(pulled.values_list('pub_date', 'id')[:limit])
+    return [recipe for _, recipe in sorted(rows, reverse=True)[:limit]]
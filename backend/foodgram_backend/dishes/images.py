@@ -0,0 +1,122 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import BoundedSemaphore, Lock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from core.versions import bump_version
+from .models import Recipe
+from .signals import RECIPES_VERSION
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = 'dishes/variants'
+
+executor = None
+slots = None
+executor_lock = Lock()
+
+
+def get_executor():
+    global executor, slots
+    with executor_lock:
+        if executor is None:
+            slots = BoundedSemaphore(
+                settings.RECIPE_IMAGE_WORKERS
+                + settings.RECIPE_IMAGE_QUEUE_SIZE
+            )
+            executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='recipe-images'
+            )
+    return executor
+
+
+def schedule_image_processing(recipe_id):
+    """Processes the recipe image after the transaction commits.
+
+    Work goes to a bounded thread pool; when the pool and its queue are
+    full the recipe stays pending for the processimages command."""
+    transaction.on_commit(lambda: submit(recipe_id))
+
+
+def submit(recipe_id):
+    if not settings.RECIPE_IMAGE_WORKERS:
+        process_image(recipe_id)
+        return
+    get_executor()
+    if not slots.acquire(blocking=False):
+        logger.warning('Image queue is full, recipe %s left pending.',
+                       recipe_id)
+        return
+    future = executor.submit(run_in_thread, recipe_id)
+    future.add_done_callback(lambda future: slots.release())
+
+
+def run_in_thread(recipe_id):
+    try:
+        process_image(recipe_id)
+    finally:
+        close_old_connections()
+
+
+def render_variant(image, max_side):
+    variant = image.copy()
+    variant.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    variant.save(buffer, 'WEBP', quality=settings.RECIPE_IMAGE_QUALITY)
+    return buffer.getvalue()
+
+
+def bump_recipes_version():
+    """Queryset updates send no signals: cached anonymous responses
+    would show the old image status until they expire."""
+    transaction.on_commit(lambda: bump_version(RECIPES_VERSION))
+
+
+def process_image(recipe_id):
+    """Writes downscaled WebP variants of the recipe image.
+
+    The EXIF orientation is applied to the pixels and the metadata is
+    not copied to the variants."""
+    recipe = Recipe.objects.filter(pk=recipe_id).only(
+        'id', 'image', 'image_variants'
+    ).first()
+    if recipe is None or not recipe.image:
+        return
+    name = recipe.image.name
+    try:
+        with default_storage.open(name) as file:
+            image = ImageOps.exif_transpose(Image.open(file))
+            image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands()
+                                  else 'RGB')
+        stem = os.path.splitext(os.path.basename(name))[0]
+        variants = {}
+        for size, max_side in settings.RECIPE_IMAGE_SIZES.items():
+            variants[size] = default_storage.save(
+                f'{VARIANTS_DIR}/{stem}_{size}.webp',
+                ContentFile(render_variant(image, max_side))
+            )
+    except Exception:
+        logger.exception('Image processing failed for recipe %s.', recipe_id)
+        if Recipe.objects.filter(pk=recipe_id, image=name).update(
+            image_status=Recipe.IMAGE_FAILED
+        ):
+            bump_recipes_version()
+        return
+    updated = Recipe.objects.filter(pk=recipe_id, image=name).update(
+        image_variants=variants, image_status=Recipe.IMAGE_READY
+    )
+    if updated:
+        bump_recipes_version()
+    stale = recipe.image_variants.values() if updated else variants.values()
+    for path in stale:
+        default_storage.delete(path)
@@ -0,0 +1,73 @@
+# Generated by Django 3.2.3 on 2026-10-18 17:41
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+SEARCH_CONFIG = 'russian'
+
+FORWARD_SQL = [
+    f'''
+    CREATE FUNCTION dishes_recipe_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.name, '')), 'A')
+            || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.text, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    ''',
+    '''
+    CREATE TRIGGER dishes_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, text ON dishes_recipe
+    FOR EACH ROW EXECUTE PROCEDURE dishes_recipe_search_vector_update();
+    ''',
+    'UPDATE dishes_recipe SET name = name;',
+    '''
+    CREATE INDEX recipe_search_vector_idx
+    ON dishes_recipe USING gin (search_vector);
+    ''',
+    '''
+    CREATE INDEX recipe_name_trgm_idx
+    ON dishes_recipe USING gin (name gin_trgm_ops);
+    ''',
+]
+
+BACKWARD_SQL = [
+    'DROP INDEX IF EXISTS recipe_name_trgm_idx;',
+    'DROP INDEX IF EXISTS recipe_search_vector_idx;',
+    'DROP TRIGGER IF EXISTS dishes_recipe_search_vector_trigger '
+    'ON dishes_recipe;',
+    'DROP FUNCTION IF EXISTS dishes_recipe_search_vector_update();',
+]
+
+
+def run_on_postgresql(statements):
+    """The trigger and GIN indexes exist only on PostgreSQL, other
+    backends fall back to icontains lookups."""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dishes', '0005_shoppinglistitem'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run_on_postgresql(FORWARD_SQL),
+            run_on_postgresql(BACKWARD_SQL)
+        ),
+    ]
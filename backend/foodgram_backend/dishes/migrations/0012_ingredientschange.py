@@ -0,0 +1,23 @@
+# Generated by Django 3.2.3 on 2026-10-18 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dishes', '0011_similaritybucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngredientsChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe', models.BigIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Ingredients change',
+            },
+        ),
+    ]
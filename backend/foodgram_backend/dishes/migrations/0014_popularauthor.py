@@ -0,0 +1,41 @@
+# Generated by Django 3.2.3 on 2026-10-18 19:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def mark_popular_authors(apps, schema_editor):
+    Follow = apps.get_model('users', 'Follow')
+    PopularAuthor = apps.get_model('dishes', 'PopularAuthor')
+    PopularAuthor.objects.bulk_create(
+        PopularAuthor(author_id=author)
+        for author in Follow.objects.values('following').annotate(
+            followers=Count('pk')
+        ).filter(
+            followers__gte=settings.FEED_FANOUT_LIMIT
+        ).values_list('following', flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0001_initial'),
+        ('dishes', '0013_ingredient_recipe_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularAuthor',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Popular author',
+            },
+        ),
+        migrations.RunPython(mark_popular_authors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.3 on 2026-10-18 19:55
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dishes', '0014_popularauthor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredientschange',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
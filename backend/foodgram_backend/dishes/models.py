@@ -1,10 +1,16 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connection, models, transaction
+from django.db.models import Sum
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
 from colorfield.fields import ColorField
 
 User = get_user_model()
 
+# Rows per shopping list upsert, within the 999 parameters of SQLite
+# before 3.32.
+UPSERT_BATCH_SIZE = 300
+
 
 class Tag(models.Model):
     name = models.CharField(max_length=200, unique=True)
@@ -32,6 +38,15 @@ class Ingredient(models.Model):
 
 
 class Recipe(models.Model):
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUSES = (
+        (IMAGE_PENDING, 'Pending'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    )
+
     pub_date = models.DateTimeField(auto_now_add=True)
     name = models.CharField(max_length=200)
     text = models.TextField()
@@ -40,6 +55,14 @@ class Recipe(models.Model):
         upload_to='dishes/',
         blank=True
     )
+    # Size name -> storage path of the downscaled WebP copies of image.
+    image_variants = models.JSONField(default=dict, editable=False)
+    image_status = models.CharField(
+        max_length=10,
+        choices=IMAGE_STATUSES,
+        default=IMAGE_PENDING,
+        editable=False
+    )
     cooking_time = models.PositiveSmallIntegerField(
         validators=[MaxValueValidator(3600), MinValueValidator(1)]
     )
@@ -53,6 +76,29 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField(
         Ingredient, through='IngredientInRecipe'
     )
+    favorites_count = models.PositiveIntegerField(default=0, editable=False)
+    in_carts_count = models.PositiveIntegerField(default=0, editable=False)
+    # Filled by a database trigger on PostgreSQL, see migration 0006.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['-favorites_count', '-id'],
+                name='recipe_favorites_count_idx'
+            ),
+            models.Index(
+                fields=['-in_carts_count', '-id'],
+                name='recipe_in_carts_count_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -64,7 +110,10 @@ class IngredientInRecipe(models.Model):
         on_delete=models.CASCADE,
         related_name='amount_recipes'
     )
-    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
+    # Covered by ingredient_recipe_idx.
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE, db_index=False
+    )
     amount = models.PositiveSmallIntegerField(
         validators=[MaxValueValidator(9999), MinValueValidator(1)]
     )
@@ -76,6 +125,11 @@ class IngredientInRecipe(models.Model):
                 name='unique_ingredient_in_recipe'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['ingredient', 'recipe'], name='ingredient_recipe_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.recipe} {self.ingredient} {self.amount}'
@@ -125,3 +179,236 @@ class Cart(models.Model):
 
     def __str__(self):
         return (f'The user {self.user} bought this recipe {self.recipe}')
+
+
+class ShoppingListManager(models.Manager):
+    """Keeps per-user ingredient totals of the cart up to date by deltas."""
+
+    def add_recipes(self, user, recipe_ids, sign=1):
+        amounts = IngredientInRecipe.objects.filter(
+            recipe__in=recipe_ids
+        ).values_list('ingredient').annotate(total=Sum('amount'))
+        self.apply_deltas(
+            [user.pk],
+            {ingredient: sign * total for ingredient, total in amounts}
+        )
+
+    def remove_recipes(self, user, recipe_ids):
+        self.add_recipes(user, recipe_ids, sign=-1)
+
+    def change_recipe(self, recipe, old_amounts, new_amounts=None):
+        """Applies the change of recipe ingredients to every cart with it.
+
+        old_amounts and new_amounts map ingredient ids to amounts, the new
+        ones are read from the database when omitted."""
+        if new_amounts is None:
+            new_amounts = dict(
+                recipe.amount_recipes.values_list('ingredient', 'amount')
+            )
+        deltas = {
+            ingredient: new_amounts.get(ingredient, 0) - amount
+            for ingredient, amount in old_amounts.items()
+        }
+        for ingredient, amount in new_amounts.items():
+            deltas.setdefault(ingredient, amount)
+        if not any(deltas.values()):
+            return
+        self.apply_deltas(
+            list(recipe.cart.values_list('user', flat=True)), deltas
+        )
+
+    def rebuild(self):
+        """Recomputes every shopping list from Cart joined with
+        IngredientInRecipe, repairing drift of the deltas. Returns the
+        number of items."""
+        totals = IngredientInRecipe.objects.filter(
+            recipe__cart__isnull=False
+        ).values_list('recipe__cart__user', 'ingredient').annotate(
+            total=Sum('amount')
+        ).order_by()
+        with transaction.atomic():
+            self.all().delete()
+            return len(self.bulk_create(
+                (
+                    self.model(user_id=user, ingredient_id=ingredient,
+                               amount=total)
+                    for user, ingredient, total in totals.iterator()
+                ),
+                batch_size=UPSERT_BATCH_SIZE
+            ))
+
+    def apply_deltas(self, user_ids, deltas):
+        """Adds the deltas to the items of every user by upserts, INSERT
+        ... ON CONFLICT (user_id, ingredient_id) DO UPDATE (PostgreSQL and
+        SQLite 3.24+): concurrent changes of the same items add up
+        instead of failing on unique_ingredient_in_shopping_list. Rows
+        are written in (user, ingredient) order so that concurrent
+        upserts lock them in the same order."""
+        deltas = {
+            ingredient: delta for ingredient, delta in deltas.items() if delta
+        }
+        if not user_ids or not deltas:
+            return
+        rows = [
+            (user, ingredient, deltas[ingredient])
+            for user in sorted(user_ids)
+            for ingredient in sorted(deltas)
+        ]
+        table = self.model._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+                batch = rows[start:start + UPSERT_BATCH_SIZE]
+                cursor.execute(
+                    f'INSERT INTO {table} (user_id, ingredient_id, amount) '
+                    f'VALUES {", ".join(["(%s, %s, %s)"] * len(batch))} '
+                    f'ON CONFLICT (user_id, ingredient_id) DO UPDATE '
+                    f'SET amount = {table}.amount + EXCLUDED.amount',
+                    [value for row in batch for value in row]
+                )
+            if any(delta < 0 for delta in deltas.values()):
+                self.filter(
+                    user__in=user_ids, ingredient__in=deltas, amount__lte=0
+                ).delete()
+
+
+class ShoppingListItem(models.Model):
+    """Materialized sum of ingredient amounts over the user's cart."""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE
+    )
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE
+    )
+    amount = models.IntegerField()
+
+    objects = ShoppingListManager()
+
+    class Meta:
+        default_related_name = 'shopping_list'
+        verbose_name = 'Shopping list item'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_ingredient_in_shopping_list'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.ingredient} {self.amount} for user {self.user}'
+
+
+class FeedItem(models.Model):
+    """Recipe of a followed author in the feed of a user, written when the
+    recipe is published (fan-out on write), see dishes.feed."""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE
+    )
+    # Copies of recipe.author and recipe.pub_date: unfollowing deletes by
+    # author, pages are read by the (user, pub_date) index alone.
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='+'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        default_related_name = 'feed'
+        verbose_name = 'Feed item'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_recipe_in_feed'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'], name='feed_user_author_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Recipe {self.recipe} in the feed of user {self.user}'
+
+
+class PopularAuthor(models.Model):
+    """Author whose recipes are read into feeds on request instead of
+    being copied to every follower, see dishes.feed."""
+    author = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='+'
+    )
+
+    class Meta:
+        verbose_name = 'Popular author'
+
+    def __str__(self):
+        return f'Popular author {self.author}'
+
+
+class TrendingScore(models.Model):
+    """Time-decayed favorite and cart activity of a recipe, written by the
+    trending command, see dishes.trending."""
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending_score'
+    )
+    # log2 of the score scaled to dishes.trending.EPOCH: ordering by it is
+    # ordering by the current score, and old rows never need rescaling.
+    rank = models.FloatField()
+
+    class Meta:
+        verbose_name = 'Trending score'
+        indexes = [
+            models.Index(fields=['-rank'], name='trending_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f'Trending rank {self.rank} of {self.recipe}'
+
+
+class TrendingState(models.Model):
+    """Last Favorite and Cart ids counted by the trending command."""
+    last_favorite = models.BigIntegerField(default=0)
+    last_cart = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(null=True)
+
+
+class SimilarityBucket(models.Model):
+    """LSH bucket of the ingredient set of a recipe: recipes sharing a
+    bucket are candidates for similar recipes, see dishes.similar."""
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, related_name='similarity_buckets'
+    )
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        verbose_name = 'Similarity bucket'
+        indexes = [
+            models.Index(
+                fields=['bucket', 'recipe'], name='similarity_bucket_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Bucket {self.bucket} of {self.recipe}'
+
+
+class IngredientsChange(models.Model):
+    """Recipe created, deleted or given other ingredients, applied by the
+    pantry index of every process, see dishes.pantry."""
+    # Not a foreign key: deletions are logged too.
+    recipe = models.BigIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Ingredients change'
+
+    def __str__(self):
+        return f'Ingredients of recipe {self.recipe} changed'
@@ -0,0 +1,228 @@
+"""Pantry search: recipes that can be cooked from a set of ingredients.
+
+The index maps every ingredient to the recipes using it, as a sorted
+array of recipe ids or, when that is not much larger, a bitset (a Python int
+with bit `id` set). A search adds up the bitsets of the pantry
+ingredients into bit-sliced counters (slice j holds bit j of the count
+of every recipe), subtracts them from the bit-sliced ingredient counts
+of recipes and reads recipes missing 0, 1, ... ingredients off the
+result, newest first. All of it is big integer arithmetic, that is C
+loops over machine words, whatever the number of recipes.
+
+Every process keeps its own index, built on first use. Recipe writes log
+an IngredientsChange row which processes apply before each search; bulk
+writes (the seed command) bump PANTRY_VERSION instead, which rebuilds
+the index. Rows older than PANTRY_CHANGES_TTL are pruned, so an index
+not refreshed for that long is rebuilt too.
+"""
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+from threading import Lock
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from core.versions import get_version
+from .models import IngredientInRecipe, IngredientsChange
+
+PANTRY_VERSION = 'pantry'
+# Changes below the last applied id re-read on every refresh, so that a
+# change committed after one with a higher id is not missed.
+OVERLAP = 1000
+
+
+def to_bitset(recipe_ids):
+    """Bitset of sorted recipe ids."""
+    if not recipe_ids:
+        return 0
+    buffer = bytearray(recipe_ids[-1] // 8 + 1)
+    for recipe in recipe_ids:
+        buffer[recipe >> 3] |= 1 << (recipe & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def add(counters, bits):
+    """Adds one to the bit-sliced counters of recipes in the bitset."""
+    for index, counter in enumerate(counters):
+        if not bits:
+            return
+        counters[index], bits = counter ^ bits, counter & bits
+    if bits:
+        counters.append(bits)
+
+
+def subtract(minuend, subtrahend):
+    """Bit-sliced difference of counters, none of which goes negative."""
+    difference = []
+    borrow = 0
+    for index in range(max(len(minuend), len(subtrahend))):
+        a = minuend[index] if index < len(minuend) else 0
+        b = subtrahend[index] if index < len(subtrahend) else 0
+        difference.append(a ^ b ^ borrow)
+        borrow = (~a & (b | borrow)) | (a & b & borrow)
+    return difference
+
+
+def equal(counters, value, bits):
+    """Recipes of the bitset with counters equal to value."""
+    if value >> len(counters):
+        return 0
+    for index, counter in enumerate(counters):
+        bits = bits & counter if value >> index & 1 else bits & ~counter
+    return bits
+
+
+class PantryIndex:
+    def __init__(self):
+        self.lock = Lock()
+        self.version = None
+        self.postings = {}
+        self.sizes = []
+        self.last_change = 0
+        self.applied = set()
+        self.refreshed = None
+
+    def refresh(self):
+        version = get_version(PANTRY_VERSION)
+        now = time.monotonic()
+        stale = (
+            self.refreshed is None
+            or now - self.refreshed >= settings.PANTRY_CHANGES_TTL
+        )
+        self.refreshed = now
+        if version != self.version or stale:
+            self.build()
+            self.version = version
+            return
+        changes = [
+            (pk, recipe) for pk, recipe in IngredientsChange.objects.filter(
+                pk__gt=self.last_change - OVERLAP
+            ).values_list('pk', 'recipe') if pk not in self.applied
+        ]
+        if not changes:
+            return
+        self.update({recipe for _, recipe in changes})
+        self.last_change = max(self.last_change, *(pk for pk, _ in changes))
+        self.applied = {
+            pk for pk in self.applied | {pk for pk, _ in changes}
+            if pk > self.last_change - OVERLAP
+        }
+
+    def build(self):
+        self.last_change = IngredientsChange.objects.aggregate(
+            last=Max('pk')
+        )['last'] or 0
+        self.applied = set()
+        recipes = defaultdict(list)
+        for recipe, ingredient in IngredientInRecipe.objects.order_by(
+            'recipe', 'ingredient'
+        ).values_list('recipe', 'ingredient').iterator(chunk_size=10000):
+            recipes[ingredient].append(recipe)
+        last_recipe = max(
+            (ids[-1] for ids in recipes.values()), default=0
+        )
+        self.postings = {}
+        self.sizes = []
+        for ingredient, ids in recipes.items():
+            bits = to_bitset(ids)
+            add(self.sizes, bits)
+            # Four bytes per id against one bit per possible id: bitsets
+            # up to four times the size of arrays skip conversions.
+            if len(ids) * 128 > last_recipe:
+                self.postings[ingredient] = bits
+            else:
+                self.postings[ingredient] = array('I', ids)
+
+    def update(self, recipe_ids):
+        current = defaultdict(set)
+        for recipe, ingredient in IngredientInRecipe.objects.filter(
+            recipe__in=recipe_ids
+        ).values_list('recipe', 'ingredient'):
+            current[recipe].add(ingredient)
+        for recipe in recipe_ids:
+            self.remove(recipe)
+            self.insert(recipe, current[recipe])
+
+    def remove(self, recipe):
+        bit = 1 << recipe
+        for ingredient, posting in self.postings.items():
+            if isinstance(posting, int):
+                self.postings[ingredient] = posting & ~bit
+                continue
+            index = bisect_left(posting, recipe)
+            if index < len(posting) and posting[index] == recipe:
+                del posting[index]
+        self.sizes = [counter & ~bit for counter in self.sizes]
+
+    def insert(self, recipe, ingredients):
+        bit = 1 << recipe
+        for ingredient in ingredients:
+            posting = self.postings.get(ingredient)
+            if posting is None:
+                self.postings[ingredient] = array('I', [recipe])
+            elif isinstance(posting, int):
+                self.postings[ingredient] = posting | bit
+            else:
+                insort(posting, recipe)
+        size = len(ingredients)
+        while len(self.sizes) < size.bit_length():
+            self.sizes.append(0)
+        for index in range(size.bit_length()):
+            if size >> index & 1:
+                self.sizes[index] |= bit
+
+    def search(self, ingredients, max_missing, limit):
+        """(recipe id, missing ingredients) of at most `limit` recipes
+        using at least one of the ingredients and missing at most
+        `max_missing` others, fewest missing and then newest first."""
+        have = []
+        for ingredient in set(ingredients):
+            posting = self.postings.get(ingredient)
+            if posting:
+                add(have, posting if isinstance(posting, int)
+                    else to_bitset(posting))
+        if not have:
+            return []
+        matched = reduce(or_, have)
+        missing = subtract(self.sizes, have)
+        results = []
+        for count in range(max_missing + 1):
+            if len(results) == limit:
+                break
+            bits = equal(missing, count, matched)
+            while bits and len(results) < limit:
+                recipe = bits.bit_length() - 1
+                results.append((recipe, count))
+                bits ^= 1 << recipe
+        return results
+
+
+index = PantryIndex()
+
+
+def search(ingredients, max_missing, limit):
+    with index.lock:
+        index.refresh()
+        return index.search(ingredients, max_missing, limit)
+
+
+def log_changes(recipe_ids):
+    IngredientsChange.objects.bulk_create(
+        IngredientsChange(recipe=recipe) for recipe in recipe_ids
+    )
+
+
+def prune_changes():
+    """Deletes changes older than PANTRY_CHANGES_TTL, which every live
+    index has applied or rebuilds past."""
+    return IngredientsChange.objects.filter(
+        created__lt=timezone.now() - timedelta(
+            seconds=settings.PANTRY_CHANGES_TTL
+        )
+    ).delete()[0]
@@ -0,0 +1,101 @@
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from core.versions import bump_version
+from users.models import Follow
+from . import feed, pantry
+from .models import (
+    Ingredient, IngredientInRecipe, Recipe, ShoppingListItem, Tag, User
+)
+
+INGREDIENTS_VERSION = 'ingredients'
+TAGS_VERSION = 'tags'
+RECIPES_VERSION = 'recipes'
+# Fields of recipe authors in recipe responses (UserReadSerializer).
+AUTHOR_FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_recipe_from_shopping_lists(sender, instance, **kwargs):
+    """Runs before the cascade removes the cart and ingredient rows."""
+    ShoppingListItem.objects.change_recipe(instance, dict(
+        instance.amount_recipes.values_list('ingredient', 'amount')
+    ), {})
+
+
+@receiver(post_save, sender=Recipe)
+def add_recipe_to_feeds(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        feed.fan_out(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_recipe_from_pantry_index(sender, instance, **kwargs):
+    pantry.log_changes([instance.pk])
+
+
+@receiver(post_save, sender=Follow)
+def add_author_to_feed(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        feed.follow(instance.user_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_author_from_feed(sender, instance, **kwargs):
+    feed.unfollow(instance.user_id, instance.following_id)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_ingredients_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version(INGREDIENTS_VERSION))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_tags_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version(TAGS_VERSION))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=IngredientInRecipe)
+@receiver(post_delete, sender=IngredientInRecipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def bump_recipes_version(sender, **kwargs):
+    """Everything shown to anonymous users on recipe pages."""
+    transaction.on_commit(lambda: bump_version(RECIPES_VERSION))
+
+
+@receiver(pre_save, sender=User)
+def compare_author_fields(sender, instance, update_fields=None, **kwargs):
+    """Notes whether a full save of an existing user changes the fields
+    shown for recipe authors."""
+    if update_fields is not None or instance.pk is None:
+        return
+    old = User.objects.filter(pk=instance.pk).values(*AUTHOR_FIELDS).first()
+    instance._author_changed = old is None or any(
+        old[field] != getattr(instance, field) for field in AUTHOR_FIELDS
+    )
+
+
+@receiver(post_save, sender=User)
+def bump_recipes_version_for_author(sender, instance, created,
+                                    update_fields=None, **kwargs):
+    """Only changes of author fields: logins save last_login, new users
+    have no recipes yet."""
+    if created:
+        return
+    if update_fields is not None:
+        changed = bool(set(update_fields) & set(AUTHOR_FIELDS))
+    else:
+        changed = getattr(instance, '_author_changed', True)
+    if changed:
+        transaction.on_commit(lambda: bump_version(RECIPES_VERSION))
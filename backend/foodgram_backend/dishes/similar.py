@@ -0,0 +1,116 @@
+"""Similar recipes by Jaccard similarity of ingredient sets.
+
+Every recipe has a MinHash signature of its ingredient set: the minimum
+of each of BANDS * ROWS hash functions over the ingredient ids. Two
+recipes agree on one value with probability equal to their Jaccard
+similarity. Signatures are cut into BANDS bands of ROWS values and each
+band is hashed into a SimilarityBucket row (locality-sensitive hashing),
+so recipes with similarity above about (1 / BANDS) ** (1 / ROWS) = 0.37
+share a bucket with high probability. Candidates sharing buckets with a
+recipe are then ranked by the exact similarity of their ingredients.
+
+The index is written with the ingredients of a recipe (see
+RecipeCreateSerializer and dishes.changes) and rebuilt by the
+indexsimilar command.
+Changing BANDS or ROWS requires a rebuild.
+"""
+import random
+from collections import defaultdict
+from functools import lru_cache
+from hashlib import blake2b
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .models import IngredientInRecipe, SimilarityBucket
+
+BANDS = 20
+ROWS = 3
+PRIME = 2 ** 61 - 1
+COEFFICIENTS = [
+    (random.Random(f'minhash:{number}').randrange(1, PRIME),
+     random.Random(f'minhash:{number}:b').randrange(PRIME))
+    for number in range(BANDS * ROWS)
+]
+# Candidates ranked exactly, those sharing the most buckets first.
+CANDIDATES = 5000
+# SQLite allows 999 parameters per statement before 3.32.
+BATCH_SIZE = 450
+
+
+@lru_cache(maxsize=None)
+def ingredient_hashes(ingredient_id):
+    return tuple((a * ingredient_id + b) % PRIME for a, b in COEFFICIENTS)
+
+
+def get_buckets(ingredient_ids):
+    """LSH buckets of an ingredient set."""
+    if not ingredient_ids:
+        return []
+    signature = [
+        min(values) for values in zip(*[
+            ingredient_hashes(ingredient) for ingredient in ingredient_ids
+        ])
+    ]
+    buckets = []
+    for band in range(BANDS):
+        values = signature[band * ROWS:(band + 1) * ROWS]
+        digest = blake2b(
+            repr((band, *values)).encode('ascii'), digest_size=8
+        ).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+
+def get_ingredients(recipe_ids):
+    """Ingredient id sets of the recipes."""
+    ingredients = defaultdict(set)
+    for recipe, ingredient in IngredientInRecipe.objects.filter(
+        recipe__in=recipe_ids
+    ).values_list('recipe', 'ingredient'):
+        ingredients[recipe].add(ingredient)
+    return ingredients
+
+
+def index_recipes(recipe_ids):
+    """Replaces the buckets of the recipes by ones of their current
+    ingredients. Rows are inserted by plain multi-row INSERTs: model
+    instances cost more than hashing here."""
+    rows = [
+        (recipe, bucket)
+        for recipe, recipe_ingredients in get_ingredients(recipe_ids).items()
+        for bucket in get_buckets(recipe_ingredients)
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        SimilarityBucket.objects.filter(recipe__in=recipe_ids).delete()
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            cursor.execute(
+                f'INSERT INTO {SimilarityBucket._meta.db_table} '
+                f'(recipe_id, bucket) VALUES '
+                + ', '.join(['(%s, %s)'] * len(batch)),
+                [value for row in batch for value in row]
+            )
+
+
+def jaccard(first, second):
+    return len(first & second) / len(first | second)
+
+
+def get_similar(recipe_id, limit):
+    """Ids of at most `limit` recipes most similar to the recipe, most
+    similar first."""
+    ingredients = get_ingredients([recipe_id])[recipe_id]
+    candidates = list(SimilarityBucket.objects.filter(
+        bucket__in=get_buckets(ingredients)
+    ).exclude(recipe=recipe_id).values('recipe').annotate(
+        shared=Count('pk')
+    ).order_by('-shared', 'recipe').values_list(
+        'recipe', flat=True
+    )[:CANDIDATES])
+    scores = sorted(
+        (-jaccard(ingredients, candidate_ingredients), candidate)
+        for candidate, candidate_ingredients
+        in get_ingredients(candidates).items()
+    )
+    return [candidate for _, candidate in scores[:limit]]
@@ -0,0 +1,89 @@
+"""Trending recipes.
+
+Favorites and cart additions add weight to the score of a recipe, and
+every weight halves every TRENDING_HALF_LIFE seconds. Instead of decaying
+all scores on each run, weights are scaled up by the time elapsed since
+EPOCH, so scores of different ages compare as they would decayed to now.
+The stored rank is log2 of the scaled score, which keeps it in float
+range for centuries of half-lives.
+
+The Favorite and Cart tables have no timestamps: events are read by id
+past the last counted ones and dated to the run that sees them, so the
+resolution of the ranking is the interval between runs.
+"""
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone as django_timezone
+
+from .models import Cart, Favorite, TrendingScore, TrendingState
+
+EPOCH = datetime(2022, 1, 1, tzinfo=timezone.utc)
+BATCH_SIZE = 5000
+
+
+def get_offset(now):
+    """log2 of the scale of a weight added at `now`."""
+    return (now - EPOCH).total_seconds() / settings.TRENDING_HALF_LIFE
+
+
+def count_events(state):
+    """Weight per recipe of the favorites and cart additions with ids past
+    the state, which is moved past them. A row committed after a higher
+    id was counted is missed, which a ranking can afford."""
+    weights = {}
+    for model, field, weight in (
+        (Favorite, 'last_favorite', settings.TRENDING_FAVORITE_WEIGHT),
+        (Cart, 'last_cart', settings.TRENDING_CART_WEIGHT),
+    ):
+        last = model.objects.aggregate(last=Max('pk'))['last']
+        if last is None or last <= getattr(state, field):
+            continue
+        events = model.objects.filter(
+            pk__gt=getattr(state, field), pk__lte=last
+        ).order_by().values_list('recipe').annotate(total=Count('pk'))
+        for recipe, total in events:
+            weights[recipe] = weights.get(recipe, 0) + weight * total
+        setattr(state, field, last)
+    return weights
+
+
+def update_scores(now=None):
+    """Adds new events to the scores and drops scores decayed below
+    TRENDING_MIN_SCORE. Returns the numbers of updated, created and
+    deleted scores."""
+    now = now or django_timezone.now()
+    offset = get_offset(now)
+    updated = created = 0
+    with transaction.atomic():
+        state, _ = TrendingState.objects.select_for_update().get_or_create(
+            pk=1
+        )
+        weights = count_events(state)
+        recipes = list(weights)
+        for start in range(0, len(recipes), BATCH_SIZE):
+            batch = recipes[start:start + BATCH_SIZE]
+            scores = TrendingScore.objects.in_bulk(batch)
+            for score in scores.values():
+                score.rank = offset + math.log2(
+                    2 ** (score.rank - offset) + weights[score.pk]
+                )
+            TrendingScore.objects.bulk_update(scores.values(), ['rank'])
+            TrendingScore.objects.bulk_create(
+                TrendingScore(
+                    recipe_id=recipe,
+                    rank=offset + math.log2(weights[recipe])
+                )
+                for recipe in batch if recipe not in scores
+            )
+            updated += len(scores)
+            created += len(batch) - len(scores)
+        deleted, _ = TrendingScore.objects.filter(
+            rank__lt=offset + math.log2(settings.TRENDING_MIN_SCORE)
+        ).delete()
+        state.updated = now
+        state.save()
+    return updated, created, deleted
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 from pathlib import Path
+from tempfile import gettempdir
 from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -38,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'django_filters',
@@ -50,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -85,7 +88,9 @@ WSGI_APPLICATION = 'foodgram_backend.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': config(
+            'DB_ENGINE', default='django.db.backends.postgresql'
+        ),
         'NAME': config('POSTGRES_DB', default='django'),
         'USER': config('POSTGRES_USER', default='django'),
         'PASSWORD': config('POSTGRES_PASSWORD', default=''),
@@ -95,6 +100,49 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Version stamps of cached data live here, so the backend has to be
+# shared by every process: workers and management commands run with
+# `docker compose exec` alike. The file based default is; a local memory
+# cache would hide changes made by other processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': config(
+            'CACHE_LOCATION',
+            default=str(Path(gettempdir()) / 'foodgram_cache')
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Responses to anonymous recipe reads.
+    'recipes': {
+        'BACKEND': config(
+            'RECIPES_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': config('RECIPES_CACHE_LOCATION', default='recipes'),
+        'TIMEOUT': config('RECIPES_CACHE_TIMEOUT', default=300, cast=int),
+    },
+}
+
+# Tags and ingredients: lifetime of cached bodies on the server and
+# max-age for clients, both are revalidated with ETag on catalog changes.
+# Bodies are rebuilt at least every CATALOG_CACHE_TIMEOUT seconds.
+CATALOG_CACHE_TIMEOUT = 60 * 5
+
+# The ingredient autocomplete index of every process is rebuilt on
+# catalog changes and at least every INGREDIENT_INDEX_TTL seconds.
+INGREDIENT_INDEX_TTL = 60 * 5
+CATALOG_CACHE_MAX_AGE = config(
+    'CATALOG_CACHE_MAX_AGE', default=60 * 60, cast=int
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -137,6 +185,19 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Downscaled WebP variants of recipe images: size name -> max side in px.
+# With 0 workers the variants are rendered in the request after commit.
+RECIPE_IMAGE_SIZES = {
+    'small': 320,
+    'medium': 960,
+    'large': 1920,
+}
+RECIPE_IMAGE_QUALITY = 80
+RECIPE_IMAGE_WORKERS = config('RECIPE_IMAGE_WORKERS', default=2, cast=int)
+RECIPE_IMAGE_QUEUE_SIZE = config(
+    'RECIPE_IMAGE_QUEUE_SIZE', default=100, cast=int
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -150,11 +211,94 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'core.pagination.LimitNumberPagination',
     'PAGE_SIZE': 4,
 }
+# Token -> user cache: per-process LRU (TTL in seconds, which also bounds
+# how long other processes accept a revoked token) and an optional
+# shared cache alias from CACHES.
+TOKEN_CACHE_TTL = config('TOKEN_CACHE_TTL', default=30, cast=int)
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_ALIAS = config('TOKEN_CACHE_ALIAS', default='')
+TOKEN_CACHE_SHARED_TTL = 60 * 5
+
+# Recipes of authors who reach FEED_FANOUT_LIMIT followers are not copied
+# into feeds but read on request, see dishes.feed, until the authors fall
+# below FEED_FANOUT_LOWER_LIMIT followers: the gap keeps authors around
+# the limit from switching on every follow. Following an author copies
+# the latest FEED_AUTHOR_HISTORY recipes.
+FEED_FANOUT_LIMIT = config('FEED_FANOUT_LIMIT', default=1000, cast=int)
+FEED_FANOUT_LOWER_LIMIT = config(
+    'FEED_FANOUT_LOWER_LIMIT', default=800, cast=int
+)
+FEED_AUTHOR_HISTORY = 100
+
+# Trending recipes: favorites and cart additions add weight to a score,
+# the weight halves every TRENDING_HALF_LIFE seconds and scores below
+# TRENDING_MIN_SCORE are dropped, see dishes.trending. The endpoint lists
+# the top TRENDING_SIZE recipes.
+TRENDING_HALF_LIFE = config(
+    'TRENDING_HALF_LIFE', default=60 * 60 * 24, cast=int
+)
+TRENDING_FAVORITE_WEIGHT = 1
+TRENDING_CART_WEIGHT = 2
+TRENDING_MIN_SCORE = 0.1
+TRENDING_SIZE = 100
+
+# Most recipes returned by /api/recipes/{id}/similar/.
+SIMILAR_SIZE = 20
+
+# /api/recipes/pantry/: most recipes returned, most missing ingredients
+# and most pantry ingredients accepted.
+PANTRY_SIZE = 50
+PANTRY_MAX_MISSING = 5
+PANTRY_MAX_INGREDIENTS = 200
+# Ingredient changes logged for pantry indexes are deleted by the
+# prunepantry command after PANTRY_CHANGES_TTL seconds; indexes not
+# refreshed for that long are rebuilt.
+PANTRY_CHANGES_TTL = 60 * 60 * 24
+
+# Most recipe ids accepted by the bulk favorite and shopping cart
+# endpoints in one request.
+RECIPES_BULK_SIZE = 100
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
 }
+
+# TrueType font with Cyrillic glyphs for the PDF shopping list, required
+# (the Debian fonts-dejavu-core package, installed by the Dockerfile).
+# PDF exports stop after SHOPPING_LIST_PDF_MAX_ROWS rows, see
+# api.renderers.PDFShoppingListRenderer.
+SHOPPING_LIST_PDF_FONT = config(
+    'SHOPPING_LIST_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+SHOPPING_LIST_PDF_MAX_ROWS = 5000
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': config('API_LOG_LEVEL', default='INFO'),
+        },
+        'core': {
+            'handlers': ['console'],
+            'level': config('API_LOG_LEVEL', default='INFO'),
+        },
+    },
+}
+
+# Requests slower than this are logged with (up to SLOW_REQUEST_SQL of)
+# their SQL statements.
+SLOW_REQUEST_SECONDS = config('SLOW_REQUEST_SECONDS', default=1.0, cast=float)
+SLOW_REQUEST_SQL = 50